@@ -290,7 +290,7 @@ class StaffListView(ManagerRequiredMixin, View):
                 a.shift.duration_hours
                 for a in ShiftAssignment.objects.filter(
                     user=member,
-                    status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
+                    status__in=ShiftAssignment.ACTIVE_STATUSES,
                     shift__start_utc__gte=week_start,
                     shift__start_utc__lt=week_end,
                 ).select_related("shift")
@@ -60,6 +60,7 @@ class AnalyticsOverviewView(ManagerRequiredMixin, View):
         total_premium = Shift.objects.filter(
             location__in=locations,
             is_published=True,
+            premium_cached=True,
             start_utc__gte=period_start,
         ).count()
 
@@ -72,7 +73,7 @@ class AnalyticsOverviewView(ManagerRequiredMixin, View):
             ).select_related("shift")
 
             total_hours = sum(a.shift.duration_hours for a in assignments)
-            premium_count = sum(1 for a in assignments if a.shift.is_premium)
+            premium_count = sum(1 for a in assignments if a.shift.premium_cached)
 
             analytics_data.append({
                 "user": member,
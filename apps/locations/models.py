@@ -7,6 +7,7 @@ uses this timezone regardless of where the viewer is located.
 """
 
 import zoneinfo
+from functools import lru_cache
 
 from django.conf import settings
 from django.db import models
@@ -17,6 +18,12 @@ from django.utils import timezone
 TIMEZONE_CHOICES = [(tz, tz) for tz in sorted(zoneinfo.available_timezones())]
 
 
+@lru_cache(maxsize=64)
+def _zoneinfo(tz_name: str) -> zoneinfo.ZoneInfo:
+    """Return the (memoized) ZoneInfo for an IANA timezone name."""
+    return zoneinfo.ZoneInfo(tz_name)
+
+
 class Location(models.Model):
     """
     A physical restaurant location operated by Coastal Eats.
@@ -65,7 +72,7 @@ class Location(models.Model):
         Returns:
             ZoneInfo instance for the location's IANA timezone string.
         """
-        return zoneinfo.ZoneInfo(self.timezone)
+        return _zoneinfo(self.timezone)
 
     def now_local(self):
         """
@@ -109,10 +109,7 @@ class LocationDetailView(ManagerRequiredMixin, View):
                     shift__location=location,
                     shift__start_utc__gte=week_start,
                     shift__start_utc__lt=week_end,
-                    status__in=[
-                        ShiftAssignment.Status.ASSIGNED,
-                        ShiftAssignment.Status.SWAP_PENDING,
-                    ],
+                    status__in=ShiftAssignment.ACTIVE_STATUSES,
                 ).select_related("shift")
             )
             staff_data.append({"cert": cert, "user": cert.user, "hours_this_week": hours})
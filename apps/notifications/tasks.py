@@ -0,0 +1,141 @@
+"""
+Celery tasks for ShiftSync notifications.
+
+Tasks:
+  record_assignment_audit      — audit entry + "New Shift Assigned" notification
+                                 for a newly created ShiftAssignment.
+  record_swap_request_audit    — audit entry + "Swap Request Received"
+                                 notification for a newly created SwapRequest.
+  record_manager_override_audit — audit entry + "Manager Override" notification
+                                 for a newly created ManagerOverride.
+
+The scheduling post_save handlers queue these with transaction.on_commit(), so
+the two INSERTs per event run on a worker instead of inside the caller's
+transaction, and never for a row that was rolled back.
+
+Design notes:
+  - Tasks take a primary key and re-fetch with select_related, so each run
+    costs one SELECT plus the two INSERTs.
+  - A missing row (deleted before the worker picked the task up) is logged and
+    skipped rather than retried.
+  - Tasks are routed to the "notifications" queue (see settings/base.py).
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="notifications.record_assignment_audit", queue="notifications")
+def record_assignment_audit(assignment_id: int) -> None:
+    """
+    Write the audit log entry and staff notification for a new assignment.
+
+    Args:
+        assignment_id: Primary key of the ShiftAssignment that was created.
+    """
+    from apps.audit.models import AuditLog
+    from apps.notifications.models import Notification
+    from apps.scheduling.models import ShiftAssignment
+
+    assignment = (
+        ShiftAssignment.objects.select_related("shift__location", "shift__required_skill")
+        .filter(pk=assignment_id)
+        .first()
+    )
+    if assignment is None:
+        logger.warning("Assignment %d no longer exists; skipping audit.", assignment_id)
+        return
+
+    AuditLog.objects.create(
+        actor_id=assignment.assigned_by_id,
+        action="shift_assignment.created",
+        content_object=assignment,
+        after={"shift": assignment.shift_id, "user": assignment.user_id},
+    )
+
+    Notification.objects.create(
+        recipient_id=assignment.user_id,
+        notification_type=Notification.Type.SHIFT_ASSIGNED,
+        title="New Shift Assigned",
+        body=f"You have been assigned to {assignment.shift}",
+        data={"shift_id": assignment.shift_id},
+    )
+
+
+@shared_task(name="notifications.record_swap_request_audit", queue="notifications")
+def record_swap_request_audit(swap_request_id: int) -> None:
+    """
+    Write the audit log entry and owner notification for a new swap/drop request.
+
+    Args:
+        swap_request_id: Primary key of the SwapRequest that was created.
+    """
+    from apps.audit.models import AuditLog
+    from apps.notifications.models import Notification
+    from apps.scheduling.models import SwapRequest
+
+    swap = (
+        SwapRequest.objects.select_related(
+            "requester", "assignment__shift__location", "assignment__shift__required_skill"
+        )
+        .filter(pk=swap_request_id)
+        .first()
+    )
+    if swap is None:
+        logger.warning("Swap request %d no longer exists; skipping audit.", swap_request_id)
+        return
+
+    AuditLog.objects.create(
+        actor_id=swap.requester_id,
+        action=f"swap_request.{swap.request_type}.created",
+        content_object=swap,
+        after={"assignment": swap.assignment_id, "status": swap.status},
+    )
+
+    Notification.objects.create(
+        recipient_id=swap.assignment.user_id,
+        notification_type=Notification.Type.SWAP_REQUEST_RECEIVED,
+        title="Swap Request Received",
+        body=f"{swap.requester.get_full_name()} requested a swap for {swap.assignment.shift}",
+        data={"swap_request_id": swap.id},
+    )
+
+
+@shared_task(name="notifications.record_manager_override_audit", queue="notifications")
+def record_manager_override_audit(override_id: int) -> None:
+    """
+    Write the audit log entry and staff notification for a manager override.
+
+    Args:
+        override_id: Primary key of the ManagerOverride that was created.
+    """
+    from apps.audit.models import AuditLog
+    from apps.notifications.models import Notification
+    from apps.scheduling.models import ManagerOverride
+
+    override = (
+        ManagerOverride.objects.select_related("manager", "assignment")
+        .filter(pk=override_id)
+        .first()
+    )
+    if override is None:
+        logger.warning("Manager override %d no longer exists; skipping audit.", override_id)
+        return
+
+    AuditLog.objects.create(
+        actor_id=override.manager_id,
+        action="manager_override.created",
+        content_object=override,
+        after={"assignment": override.assignment_id, "reason": override.reason},
+    )
+
+    Notification.objects.create(
+        recipient_id=override.assignment.user_id,
+        notification_type=Notification.Type.SHIFT_CHANGED,
+        title="Manager Override",
+        body=f"Your shift assignment was overridden by {override.manager.get_full_name()}",
+        data={"override_id": override.id},
+    )
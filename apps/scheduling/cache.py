@@ -0,0 +1,58 @@
+"""
+Cache keys and invalidation for scheduling's rendered fragments.
+
+Kept apart from views.py so the signal receivers that drop these caches
+(signals.py, loaded from AppConfig.ready) don't import the views module.
+
+Each cache varies on a generation token stored under its own key; rotating
+the token drops every entry at once on any cache backend, and stale entries
+simply expire.
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+# Every open dashboard polls the on-duty partial, and its HTML depends only on
+# the set of locations in scope, so render it once per scope and poll interval.
+ON_DUTY_CACHE_TIMEOUT = 60  # seconds
+_ON_DUTY_GENERATION_KEY = "sched:onduty:gen"
+
+
+def on_duty_generation() -> str:
+    """Return the current on-duty cache generation token, creating one if unset."""
+    return cache.get_or_set(_ON_DUTY_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_on_duty_cache() -> None:
+    """
+    Drop every cached on-duty partial.
+
+    Rotates the generation token in the cache keys, like
+    invalidate_suggestion_cache(). Changes that skip signals (bulk_create,
+    update()) show up once the entry expires, within ON_DUTY_CACHE_TIMEOUT.
+    """
+    cache.set(_ON_DUTY_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+# The admin's pending-approvals and recent-activity cards are the same for every
+# admin, so their rendered HTML is cached (see the {% cache %} blocks in
+# dashboard_admin.html) and dropped when swap requests or audit rows are saved.
+ADMIN_FRAGMENT_CACHE_TIMEOUT = 60  # seconds
+_ADMIN_FRAGMENT_GENERATION_KEY = "sched:adminfrag:gen"
+
+
+def admin_fragment_generation() -> str:
+    """Return the current admin fragment generation token, creating one if unset."""
+    return cache.get_or_set(_ADMIN_FRAGMENT_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_admin_fragments() -> None:
+    """
+    Drop the cached pending-approvals and recent-activity admin fragments.
+
+    Rotates the generation token the fragments vary on, like
+    invalidate_on_duty_cache(). Audit rows written with bulk_create show up
+    once the fragment expires, within ADMIN_FRAGMENT_CACHE_TIMEOUT.
+    """
+    cache.set(_ADMIN_FRAGMENT_GENERATION_KEY, uuid.uuid4().hex, None)
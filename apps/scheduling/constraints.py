@@ -23,19 +23,28 @@ Adding a new constraint:
 Design notes:
   - All time comparisons are done in UTC to avoid DST ambiguity.
   - SELECT FOR UPDATE is used by the engine entry point to prevent TOCTOU races.
-  - Suggestions are lightweight (id + name) to avoid N+1 queries.
+  - Suggestions are lightweight (id + name) to avoid N+1 queries, and cached
+    per (location, skill) for SUGGESTION_CACHE_TIMEOUT seconds.
 """
 
 import logging
+import uuid
 from dataclasses import dataclass, field
+from enum import IntEnum
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional
 from zoneinfo import ZoneInfo
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from apps.scheduling import constraints_numba as kernels
+
 
 if TYPE_CHECKING:
     from apps.accounts.models import Skill, User, StaffAvailability
@@ -43,12 +52,34 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Suggestions depend only on (location, skill), so cache them across failed probes.
+SUGGESTION_CACHE_TIMEOUT = 60  # seconds
+_SUGGESTION_GENERATION_KEY = "sched:sugg:gen"
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
 
 # ---------------------------------------------------------------------------
 # Result types
 # ---------------------------------------------------------------------------
 
 
+class Severity(IntEnum):
+    """
+    How serious a constraint result is, ordered most to least severe.
+
+    Integer ordering lets the pipeline test "does this stop the assignment?"
+    with a single comparison (`severity <= Severity.OVERRIDE_REQUIRED`).
+    Use `.name.lower()` (or ConstraintResult.severity_label) when a string is
+    needed for JSON, logs or templates.
+    """
+
+    BLOCK = 0
+    OVERRIDE_REQUIRED = 1
+    WARNING = 2
+    OK = 3
+
+
 @dataclass
 class Suggestion:
     """A suggested alternative staff member when a constraint blocks an assignment."""
@@ -65,30 +96,36 @@ class ConstraintResult:
 
     Attributes:
         ok: True if the assignment is allowed, False if blocked.
-        severity: 'block' (cannot proceed), 'warning' (can proceed with acknowledgement),
-                  'override_required' (requires manager override with documented reason).
+        severity: Severity.BLOCK (cannot proceed), Severity.WARNING (can proceed with
+                  acknowledgement), Severity.OVERRIDE_REQUIRED (requires manager override
+                  with documented reason) or Severity.OK.
         constraint_id: Machine-readable identifier of the violated constraint.
         reason: Human-readable explanation of why the constraint failed.
         suggestions: Alternative staff members the manager might consider.
     """
 
     ok: bool
-    severity: str = "block"  # 'block' | 'warning' | 'override_required' | 'ok'
+    severity: Severity = Severity.BLOCK
     constraint_id: str = ""
     reason: str = ""
     suggestions: list[Suggestion] = field(default_factory=list)
 
+    @property
+    def severity_label(self) -> str:
+        """Lower-case severity name ('ok', 'warning', 'block', 'override_required')."""
+        return self.severity.name.lower()
+
     @classmethod
     def success(cls) -> "ConstraintResult":
-        """Return a passing constraint result."""
-        return cls(ok=True, severity="ok")
+        """Return the shared passing constraint result."""
+        return _SUCCESS
 
     @classmethod
     def warning(cls, constraint_id: str, reason: str, suggestions=None) -> "ConstraintResult":
         """Return a warning result that can be acknowledged by the manager."""
         return cls(
             ok=True,  # ok=True because warnings don't block; they just inform
-            severity="warning",
+            severity=Severity.WARNING,
             constraint_id=constraint_id,
             reason=reason,
             suggestions=suggestions or [],
@@ -99,7 +136,7 @@ class ConstraintResult:
         """Return a hard-block result that prevents assignment."""
         return cls(
             ok=False,
-            severity="block",
+            severity=Severity.BLOCK,
             constraint_id=constraint_id,
             reason=reason,
             suggestions=suggestions or [],
@@ -110,31 +147,38 @@ class ConstraintResult:
         """Return a result that requires a documented manager override."""
         return cls(
             ok=False,
-            severity="override_required",
+            severity=Severity.OVERRIDE_REQUIRED,
             constraint_id=constraint_id,
             reason=reason,
         )
 
 
+# Every passing check returns this one instance; results are never mutated.
+_SUCCESS = ConstraintResult(ok=True, severity=Severity.OK)
+
+
 # ---------------------------------------------------------------------------
 # Individual constraint checks
 # ---------------------------------------------------------------------------
 
 
-def check_skill_match(user: "User", shift: "Shift") -> ConstraintResult:
+def check_skill_match(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Verify the staff member has the skill required by the shift.
 
     Args:
         user: The staff member being considered for assignment.
         shift: The shift to be assigned.
+        exclude_assignment_id: Unused; accepted so every check shares one signature.
 
     Returns:
         ConstraintResult with suggestions of other staff who have the required skill.
     """
     from apps.accounts.models import User as UserModel
 
-    if user.skills.filter(pk=shift.required_skill.pk).exists():
+    if user.skills.filter(pk=shift.required_skill_id).exists():
         return ConstraintResult.success()
 
     # Build suggestions: other staff with the right skill at this location
@@ -150,13 +194,16 @@ def check_skill_match(user: "User", shift: "Shift") -> ConstraintResult:
     )
 
 
-def check_location_certification(user: "User", shift: "Shift") -> ConstraintResult:
+def check_location_certification(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Verify the staff member has an active certification to work at the shift's location.
 
     Args:
         user: The staff member being considered for assignment.
         shift: The shift to be assigned.
+        exclude_assignment_id: Unused; accepted so every check shares one signature.
 
     Returns:
         ConstraintResult. Blocked if no active certification exists.
@@ -182,7 +229,41 @@ def check_location_certification(user: "User", shift: "Shift") -> ConstraintResu
     )
 
 
-def check_availability(user: "User", shift: "Shift") -> ConstraintResult:
+def check_eligibility(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
+    """
+    Run check_skill_match and check_location_certification as one query.
+
+    Most candidates pass both, so a single EXISTS joining the user's active
+    certification at the location to their skills settles the common case.
+    Only when it fails do the individual checks run, to name which one failed.
+
+    Args:
+        user: The staff member being considered for assignment.
+        shift: The shift to be assigned.
+        exclude_assignment_id: Unused; accepted so every check shares one signature.
+
+    Returns:
+        Success, or the skill/certification block the individual check returns.
+    """
+    from apps.locations.models import LocationCertification
+
+    if LocationCertification.objects.filter(
+        user=user, location_id=shift.location_id, is_active=True,
+        user__skills=shift.required_skill_id,
+    ).exists():
+        return ConstraintResult.success()
+
+    result = check_skill_match(user, shift, exclude_assignment_id)
+    if not result.ok:
+        return result
+    return check_location_certification(user, shift, exclude_assignment_id)
+
+
+def check_availability(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Verify the staff member's availability covers the entire shift window.
 
@@ -192,6 +273,7 @@ def check_availability(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The shift to be assigned.
+        exclude_assignment_id: Unused; accepted so every check shares one signature.
 
     Returns:
         ConstraintResult explaining which availability window is missing or conflicting.
@@ -203,12 +285,20 @@ def check_availability(user: "User", shift: "Shift") -> ConstraintResult:
     shift_date = shift_start_local.date()
     shift_weekday = shift_start_local.weekday()
 
-    # Check for one-off override first (takes precedence)
-    one_off = StaffAvailability.objects.filter(
-        user=user, recurrence=StaffAvailability.Recurrence.ONE_OFF, specific_date=shift_date
-    ).first()
+    # Fetch the one-off override and the weekly rule in one query. "one_off" sorts
+    # before "weekly", so the override (which takes precedence) comes first.
+    windows = list(
+        StaffAvailability.objects.filter(user=user)
+        .filter(
+            Q(recurrence=StaffAvailability.Recurrence.ONE_OFF, specific_date=shift_date)
+            | Q(recurrence=StaffAvailability.Recurrence.WEEKLY, day_of_week=shift_weekday)
+        )
+        .order_by("recurrence")[:1]
+    )
+    window = windows[0] if windows else None
 
-    if one_off:
+    if window and window.recurrence == StaffAvailability.Recurrence.ONE_OFF:
+        one_off = window
         if one_off.is_unavailable_day:
             return ConstraintResult.block(
                 constraint_id="availability_one_off_unavailable",
@@ -220,26 +310,24 @@ def check_availability(user: "User", shift: "Shift") -> ConstraintResult:
         return _check_time_window_covers_shift(user, one_off, shift, "one-off availability")
 
     # Fall back to weekly recurring availability
-    weekly = StaffAvailability.objects.filter(
-        user=user,
-        recurrence=StaffAvailability.Recurrence.WEEKLY,
-        day_of_week=shift_weekday,
-    ).first()
+    weekly = window
 
     if not weekly:
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         return ConstraintResult.block(
             constraint_id="availability_no_window",
             reason=(
                 f"{user.get_full_name()} has not set availability for "
-                f"{days[shift_weekday]}s. Ask them to update their availability."
+                f"{WEEKDAY_NAMES[shift_weekday]}s. Ask them to update their availability."
             ),
         )
 
     if weekly.is_unavailable_day:
         return ConstraintResult.block(
             constraint_id="availability_weekly_unavailable",
-            reason=f"{user.get_full_name()} is marked as unavailable on {days[shift_weekday]}s.",
+            reason=(
+                f"{user.get_full_name()} is marked as unavailable on "
+                f"{WEEKDAY_NAMES[shift_weekday]}s."
+            ),
         )
 
     return _check_time_window_covers_shift(user, weekly, shift, "weekly availability")
@@ -297,7 +385,38 @@ def _check_time_window_covers_shift(
     )
 
 
-def check_no_double_booking(user: "User", shift: "Shift") -> ConstraintResult:
+def _active_assignments(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> models.QuerySet:
+    """
+    Return the user's active (assigned or swap-pending) assignments, minus the one being checked.
+
+    When the caller re-checks an existing assignment it passes its pk, which is
+    excluded by primary key. Otherwise any assignment to the same shift is left
+    out, so re-assigning someone to their own shift never conflicts with itself.
+
+    Args:
+        user: The staff member being considered for assignment.
+        shift: The proposed shift.
+        exclude_assignment_id: Optional pk of an existing assignment to ignore.
+
+    Returns:
+        QuerySet of ShiftAssignment.
+    """
+    from apps.scheduling.models import ShiftAssignment
+
+    active = ShiftAssignment.objects.filter(
+        user=user,
+        status__in=ShiftAssignment.ACTIVE_STATUSES,
+    )
+    if exclude_assignment_id is not None:
+        return active.exclude(pk=exclude_assignment_id)
+    return active.exclude(shift_id=shift.pk)
+
+
+def check_no_double_booking(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Ensure the staff member has no overlapping shift assignments, even cross-location.
 
@@ -306,24 +425,19 @@ def check_no_double_booking(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The proposed new shift.
+        exclude_assignment_id: Existing assignment to ignore (see _active_assignments).
 
     Returns:
         ConstraintResult with the conflicting shift details.
     """
-    from apps.scheduling.models import ShiftAssignment
-
     # Find assignments where the shifts overlap
     conflicting = (
-        ShiftAssignment.objects.filter(
-            user=user,
-            status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
-        )
+        _active_assignments(user, shift, exclude_assignment_id)
         .filter(
             # Overlap condition: existing.start < new.end AND existing.end > new.start
             shift__start_utc__lt=shift.end_utc,
             shift__end_utc__gt=shift.start_utc,
         )
-        .exclude(shift=shift)  # Exclude the shift being re-assigned
         .select_related("shift__location")
         .first()
     )
@@ -343,7 +457,9 @@ def check_no_double_booking(user: "User", shift: "Shift") -> ConstraintResult:
     )
 
 
-def check_minimum_rest(user: "User", shift: "Shift") -> ConstraintResult:
+def check_minimum_rest(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Enforce the 10-hour minimum rest period between consecutive shifts.
 
@@ -354,73 +470,56 @@ def check_minimum_rest(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The proposed new shift.
+        exclude_assignment_id: Existing assignment to ignore (see _active_assignments).
 
     Returns:
         ConstraintResult with the conflicting shift and actual gap.
     """
-    from apps.scheduling.models import ShiftAssignment
-
     config = settings.SHIFTSYNC
     min_rest = timedelta(hours=config["MIN_REST_HOURS"])
 
-    active_statuses = [ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING]
-
-    # Check: does a previous shift end too soon before this one?
-    too_recent = (
-        ShiftAssignment.objects.filter(
-            user=user, status__in=active_statuses
-        )
-        .filter(
+    # One fetch of every shift within min_rest of this one, earliest end first so
+    # a conflict before the shift is reported ahead of one after it
+    nearby = list(
+        _active_assignments(user, shift, exclude_assignment_id).filter(
             shift__end_utc__gt=shift.start_utc - min_rest,
-            shift__end_utc__lte=shift.start_utc,
-        )
-        .exclude(shift=shift)
-        .select_related("shift__location")
-        .first()
+            shift__start_utc__lt=shift.end_utc + min_rest,
+        ).order_by("shift__end_utc").values_list("shift__start_utc", "shift__end_utc", "shift__location__name")
     )
+    starts, ends = kernels.to_arrays((start, end) for start, end, _ in nearby)
+    conflict = kernels.rest_gap_conflict(
+        starts, ends, kernels.to_ns(shift.start_utc), kernels.to_ns(shift.end_utc),
+        int(config["MIN_REST_HOURS"] * kernels.NS_PER_HOUR),
+    )
+    if conflict < 0:
+        return ConstraintResult.success()
 
-    if too_recent:
-        gap = shift.start_utc - too_recent.shift.end_utc
-        gap_hours = gap.total_seconds() / 3600
+    other_start, other_end, location_name = nearby[conflict]
+    if other_end <= shift.start_utc:
+        gap_hours = (shift.start_utc - other_end).total_seconds() / 3600
         return ConstraintResult.block(
             constraint_id="minimum_rest_before",
             reason=(
                 f"{user.get_full_name()} would only have {gap_hours:.1f} hours of rest "
-                f"after their shift ending at {too_recent.shift.location.name}. "
+                f"after their shift ending at {location_name}. "
                 f"The minimum is {config['MIN_REST_HOURS']} hours."
             ),
         )
 
-    # Check: does the next shift start too soon after this one ends?
-    too_soon = (
-        ShiftAssignment.objects.filter(
-            user=user, status__in=active_statuses
-        )
-        .filter(
-            shift__start_utc__lt=shift.end_utc + min_rest,
-            shift__start_utc__gte=shift.end_utc,
-        )
-        .exclude(shift=shift)
-        .select_related("shift__location")
-        .first()
+    gap_hours = (other_start - shift.end_utc).total_seconds() / 3600
+    return ConstraintResult.block(
+        constraint_id="minimum_rest_after",
+        reason=(
+            f"{user.get_full_name()} has a shift starting at {location_name} "
+            f"only {gap_hours:.1f} hours after this shift would end. "
+            f"The minimum rest period is {config['MIN_REST_HOURS']} hours."
+        ),
     )
 
-    if too_soon:
-        gap = too_soon.shift.start_utc - shift.end_utc
-        gap_hours = gap.total_seconds() / 3600
-        return ConstraintResult.block(
-            constraint_id="minimum_rest_after",
-            reason=(
-                f"{user.get_full_name()} has a shift starting at {too_soon.shift.location.name} "
-                f"only {gap_hours:.1f} hours after this shift would end. "
-                f"The minimum rest period is {config['MIN_REST_HOURS']} hours."
-            ),
-        )
-
-    return ConstraintResult.success()
 
-
-def check_daily_hours(user: "User", shift: "Shift") -> ConstraintResult:
+def check_daily_hours(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Check daily hour limits for the shift's calendar day.
 
@@ -431,25 +530,31 @@ def check_daily_hours(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The proposed new shift.
+        exclude_assignment_id: Existing assignment to ignore (see _active_assignments).
 
     Returns:
         ConstraintResult (warning or block depending on severity).
     """
-    from apps.scheduling.models import ShiftAssignment
-
     config = settings.SHIFTSYNC
     local_tz = shift.location.get_zoneinfo()
     shift_date = shift.start_utc.astimezone(local_tz).date()
 
-    # Find all assignments on the same calendar day (in the location's timezone)
-    existing = ShiftAssignment.objects.filter(
-        user=user,
-        status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
-    ).filter(
-        shift__start_utc__date=shift_date
-    ).exclude(shift=shift).select_related("shift")
+    # Day boundaries match the `__date` lookup semantics (active timezone), but as a
+    # sargable range so the start_utc index can be used.
+    current_tz = timezone.get_current_timezone()
+    day_start = datetime.combine(shift_date, datetime.min.time(), tzinfo=current_tz)
+    day_end = datetime.combine(shift_date + timedelta(days=1), datetime.min.time(), tzinfo=current_tz)
 
-    existing_hours = sum(a.shift.duration_hours for a in existing)
+    # Find all assignments on the same calendar day (in the location's timezone)
+    existing = _active_assignments(user, shift, exclude_assignment_id).filter(
+        shift__start_utc__gte=day_start,
+        shift__start_utc__lt=day_end,
+    ).values_list("shift__start_utc", "shift__end_utc")
+
+    starts, ends = kernels.to_arrays(existing)
+    existing_hours = kernels.daily_hours_sum(
+        starts, ends, kernels.to_ns(day_start), kernels.to_ns(day_end)
+    )
     total_hours = existing_hours + shift.duration_hours
 
     if total_hours > config["DAILY_HOURS_HARD_LIMIT"]:
@@ -475,7 +580,9 @@ def check_daily_hours(user: "User", shift: "Shift") -> ConstraintResult:
     return ConstraintResult.success()
 
 
-def check_weekly_hours(user: "User", shift: "Shift") -> ConstraintResult:
+def check_weekly_hours(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Check weekly hour totals for the ISO week containing this shift.
 
@@ -488,11 +595,11 @@ def check_weekly_hours(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The proposed new shift.
+        exclude_assignment_id: Existing assignment to ignore (see _active_assignments).
 
     Returns:
         ConstraintResult (warning or block).
     """
-    from apps.scheduling.models import ShiftAssignment
     from datetime import timezone as dt_timezone
 
     config = settings.SHIFTSYNC
@@ -507,12 +614,10 @@ def check_weekly_hours(user: "User", shift: "Shift") -> ConstraintResult:
     week_start_utc = dt.combine(monday, dt.min.time(), tzinfo=local_tz).astimezone(dt_timezone.utc)
     week_end_utc = dt.combine(sunday, dt.max.time(), tzinfo=local_tz).astimezone(dt_timezone.utc)
 
-    existing = ShiftAssignment.objects.filter(
-        user=user,
-        status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
+    existing = _active_assignments(user, shift, exclude_assignment_id).filter(
         shift__start_utc__gte=week_start_utc,
         shift__start_utc__lte=week_end_utc,
-    ).exclude(shift=shift).select_related("shift")
+    ).select_related("shift")
 
     current_hours = sum(a.shift.duration_hours for a in existing)
     projected_hours = current_hours + shift.duration_hours
@@ -540,7 +645,9 @@ def check_weekly_hours(user: "User", shift: "Shift") -> ConstraintResult:
     return ConstraintResult.success()
 
 
-def check_consecutive_days(user: "User", shift: "Shift") -> ConstraintResult:
+def check_consecutive_days(
+    user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+) -> ConstraintResult:
     """
     Check for excessive consecutive work days.
 
@@ -553,29 +660,25 @@ def check_consecutive_days(user: "User", shift: "Shift") -> ConstraintResult:
     Args:
         user: The staff member being considered for assignment.
         shift: The proposed new shift.
+        exclude_assignment_id: Existing assignment to ignore (see _active_assignments).
 
     Returns:
         ConstraintResult (warning or override_required).
     """
-    from apps.scheduling.models import ShiftAssignment
-
     config = settings.SHIFTSYNC
     local_tz = shift.location.get_zoneinfo()
     shift_date = shift.start_utc.astimezone(local_tz).date()
 
-    # Walk backwards to count consecutive worked days before this shift
-    consecutive_before = 0
-    check_date = shift_date - timedelta(days=1)
-    for _ in range(7):  # Check up to 7 days back
-        has_work = ShiftAssignment.objects.filter(
-            user=user,
-            status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
-            shift__start_utc__date=check_date,
-        ).exists()
-        if not has_work:
-            break
-        consecutive_before += 1
-        check_date -= timedelta(days=1)
+    # Fetch the 7-day lookback window in one query, then count the unbroken run
+    # of worked days before this shift on plain date ordinals.
+    worked_starts = _active_assignments(user, shift, exclude_assignment_id).filter(
+        shift__start_utc__date__gte=shift_date - timedelta(days=7),
+        shift__start_utc__date__lt=shift_date,
+    ).values_list("shift__start_utc", flat=True)
+    consecutive_before = kernels.consecutive_days_before(
+        (timezone.localtime(start).date().toordinal() for start in worked_starts),
+        shift_date.toordinal(),
+    )
 
     # This shift would be day (consecutive_before + 1) in the run
     total_consecutive = consecutive_before + 1
@@ -605,10 +708,10 @@ def check_consecutive_days(user: "User", shift: "Shift") -> ConstraintResult:
 # Constraint pipeline
 # ---------------------------------------------------------------------------
 
-# Ordered list of (function, can_short_circuit) tuples.
+# Ordered tuple of (function, can_short_circuit) pairs.
 # Short-circuit = stop checking further if this fails (for speed).
 # Non-short-circuit constraints are still checked even after prior failures (for completeness).
-CONSTRAINT_PIPELINE = [
+CONSTRAINT_PIPELINE = (
     (check_skill_match, True),               # Must-have before anything else
     (check_location_certification, True),     # Must-have
     (check_availability, True),               # Must-have
@@ -617,7 +720,62 @@ CONSTRAINT_PIPELINE = [
     (check_daily_hours, False),               # Warning or block
     (check_weekly_hours, False),              # Warning or block
     (check_consecutive_days, False),          # Warning or override_required
-]
+)
+
+# The checks that read the user's other assignments, and so can change outcome
+# when a concurrent assign commits (see ShiftAssignmentService.assign)
+ASSIGNMENT_CHECKS = tuple(
+    check_fn for check_fn, _ in CONSTRAINT_PIPELINE
+    if check_fn not in (check_skill_match, check_location_certification, check_availability)
+)
+
+# check() folds the two membership checks into one query (check_eligibility);
+# check_all() keeps CONSTRAINT_PIPELINE so it can report both failures at once
+_CHECK_PIPELINE = ((check_eligibility, True),) + tuple(
+    step for step in CONSTRAINT_PIPELINE
+    if step[0] not in (check_skill_match, check_location_certification)
+)
+
+
+@lru_cache(maxsize=8)
+def _compile_pipeline(
+    pipeline: tuple[tuple[Callable[["User", "Shift", Optional[int]], ConstraintResult], bool], ...],
+) -> Callable[["User", "Shift", Optional[int]], Optional[ConstraintResult]]:
+    """
+    Build a specialised runner for an ordered tuple of constraint checks.
+
+    The check functions are bound as closure locals once, so each call skips
+    re-reading CONSTRAINT_PIPELINE and unpacking its (function, flag) tuples.
+    Runners are cached per distinct pipeline, which matters when a bulk solver
+    evaluates thousands of (user, shift) pairs in one request.
+
+    Args:
+        pipeline: (check function, can_short_circuit) pairs in run order,
+                  normally CONSTRAINT_PIPELINE.
+
+    Returns:
+        A callable (user, shift, exclude_assignment_id) -> the first blocking
+        result, else the first warning, else None when every check passes.
+    """
+
+    steps = tuple(check_fn for check_fn, _ in pipeline)
+
+    def run(
+        user: "User", shift: "Shift", exclude_assignment_id: Optional[int] = None
+    ) -> Optional[ConstraintResult]:
+        first_warning = None
+        for check_fn in steps:
+            result = check_fn(user, shift, exclude_assignment_id)
+            if result is _SUCCESS:
+                continue
+            if result.severity <= Severity.OVERRIDE_REQUIRED:
+                return result
+            # Warnings don't block — remember the first, keep going
+            if first_warning is None and result.severity == Severity.WARNING:
+                first_warning = result
+        return first_warning
+
+    return run
 
 
 class ConstraintEngine:
@@ -659,35 +817,28 @@ class ConstraintEngine:
         # Lock the user's assignments to prevent concurrent modification
         ShiftAssignment.objects.select_for_update().filter(user=user)
 
-        warnings = []
-
-        for check_fn, short_circuit in CONSTRAINT_PIPELINE:
-            result = check_fn(user, shift)
-
-            if result.severity == "ok":
-                continue
-
-            if result.severity in ("block", "override_required"):
-                logger.info(
-                    "Constraint failed: %s for user=%d shift=%d: %s",
-                    result.constraint_id,
-                    user.pk,
-                    shift.pk,
-                    result.reason,
-                )
-                return result
+        run_pipeline = _compile_pipeline(_CHECK_PIPELINE)
+        result = run_pipeline(user, shift, exclude_assignment_id)
 
-            # It's a warning — collect it but keep going
-            warnings.append(result)
+        if result is None:
+            return ConstraintResult.success()
 
-        # Return the first warning if any exist, otherwise success
-        if warnings:
-            return warnings[0]
-
-        return ConstraintResult.success()
+        if not result.ok:
+            logger.info(
+                "Constraint failed: %s for user=%d shift=%d: %s",
+                result.constraint_id,
+                user.pk,
+                shift.pk,
+                result.reason,
+            )
+        return result
 
     @staticmethod
-    def check_all(user: "User", shift: "Shift") -> list[ConstraintResult]:
+    def check_all(
+        user: "User",
+        shift: "Shift",
+        exclude_assignment_id: Optional[int] = None,
+    ) -> list[ConstraintResult]:
         """
         Run all constraints and return ALL results (for "what-if" projections).
 
@@ -697,17 +848,57 @@ class ConstraintEngine:
         Args:
             user: The staff member to check.
             shift: The shift to assign them to.
+            exclude_assignment_id: Passed through to every check.
 
         Returns:
             List of all non-success ConstraintResults. Empty list means all clear.
         """
         results = []
         for check_fn, _ in CONSTRAINT_PIPELINE:
-            result = check_fn(user, shift)
-            if result.severity != "ok":
+            result = check_fn(user, shift, exclude_assignment_id)
+            if result.severity != Severity.OK:
                 results.append(result)
         return results
 
+    @staticmethod
+    async def acheck(
+        user: "User",
+        shift: "Shift",
+        exclude_assignment_id: Optional[int] = None,
+    ) -> ConstraintResult:
+        """
+        Async counterpart of check() for ASGI views and consumers.
+
+        The whole pipeline runs in one thread-sensitive sync_to_async call, so
+        its transaction and SELECT FOR UPDATE lock share a single connection
+        and the event loop is free while the queries run. The checks are not
+        fanned out with asyncio.gather(): Django's async ORM executes every
+        query on that same worker thread, so concurrent probes would queue
+        rather than overlap.
+
+        Args:
+            user: The staff member to check.
+            shift: The shift to assign them to.
+            exclude_assignment_id: Passed through to check().
+
+        Returns:
+            The same ConstraintResult check() would return.
+        """
+        return await sync_to_async(ConstraintEngine.check)(
+            user, shift, exclude_assignment_id=exclude_assignment_id
+        )
+
+    @staticmethod
+    async def acheck_all(
+        user: "User",
+        shift: "Shift",
+        exclude_assignment_id: Optional[int] = None,
+    ) -> list[ConstraintResult]:
+        """Async counterpart of check_all() for ASGI "what-if" requests."""
+        return await sync_to_async(ConstraintEngine.check_all)(
+            user, shift, exclude_assignment_id=exclude_assignment_id
+        )
+
 
 # ---------------------------------------------------------------------------
 # Helper: build alternative suggestions
@@ -723,7 +914,8 @@ def _get_skilled_available_suggestions(shift: "Shift") -> list[Suggestion]:
 
     This is a fast approximation — it doesn't run full constraint checks on each
     candidate (that would be N+1). Full checks run when the manager selects
-    a suggestion.
+    a suggestion. Results are cached per (location, skill) and dropped by
+    invalidate_suggestion_cache() whenever certifications or skills change.
 
     Args:
         shift: The shift for which to find alternatives.
@@ -734,22 +926,41 @@ def _get_skilled_available_suggestions(shift: "Shift") -> list[Suggestion]:
     from apps.accounts.models import User
     from apps.locations.models import LocationCertification
 
+    generation = cache.get_or_set(_SUGGESTION_GENERATION_KEY, uuid.uuid4().hex, None)
+    cache_key = f"sched:sugg:{generation}:{shift.location_id}:{shift.required_skill_id}"
+    suggestions = cache.get(cache_key)
+    if suggestions is not None:
+        return suggestions
+
     certified_user_ids = LocationCertification.objects.filter(
-        location=shift.location, is_active=True
+        location_id=shift.location_id, is_active=True
     ).values_list("user_id", flat=True)
 
     candidates = User.objects.filter(
         pk__in=certified_user_ids,
         role=User.Role.STAFF,
-        skills=shift.required_skill,
+        skills=shift.required_skill_id,
         is_active=True,
-    ).distinct()[:5]
+    ).distinct().only("id", "first_name", "last_name")[:5]
 
-    return [
+    suggestions = [
         Suggestion(
             user_id=c.pk,
             full_name=c.get_full_name(),
             reason=f"Certified at {shift.location.name}, has {shift.required_skill.display_name} skill.",
         )
         for c in candidates
-    ]
\ No newline at end of file
+    ]
+    cache.set(cache_key, suggestions, SUGGESTION_CACHE_TIMEOUT)
+    return suggestions
+
+
+def invalidate_suggestion_cache() -> None:
+    """
+    Drop every cached suggestion list.
+
+    Rotates the generation token embedded in each cache key instead of deleting
+    keys by pattern, so it works on any cache backend. Stale entries simply
+    expire after SUGGESTION_CACHE_TIMEOUT.
+    """
+    cache.set(_SUGGESTION_GENERATION_KEY, uuid.uuid4().hex, None)
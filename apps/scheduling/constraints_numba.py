@@ -0,0 +1,160 @@
+"""
+Integer-arithmetic kernels for the scheduling constraint engine and schedule grid.
+
+Once a staff member's assignments are fetched as flat (start, end) pairs, the
+rest-gap and daily-sum rules reduce to loops over int64 nanosecond timestamps.
+These kernels are JIT-compiled with Numba when it is installed; otherwise the
+identical pure-Python bodies run. The consecutive-day rule packs the lookback
+week into a small bit-set and needs no loop at all, so it stays plain Python.
+
+Numba is an optional dependency — nothing here requires it:
+
+    pip install numba   # enables the compiled path
+
+Usage:
+    from apps.scheduling import constraints_numba as kernels
+
+    starts, ends = kernels.to_arrays(assignment_pairs)
+    i = kernels.rest_gap_conflict(starts, ends, new_start_ns, new_end_ns, min_rest_ns)
+
+Design notes:
+  - Kernels take plain arrays (or lists on the fallback path) so they stay
+    free of ORM objects and can be compiled in nopython mode.
+  - `cache=True` persists compiled machine code next to this module so worker
+    processes don't pay the JIT cold start on every boot.
+  - `parallel=True` is deliberately not used: a user has ~20 assignments in any
+    window, far below the point where thread fan-out pays for itself.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+try:  # pragma: no cover — exercised only where numba is installed
+    import numpy as np
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:
+    np = None
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so the kernels run as plain Python."""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+# ---------------------------------------------------------------------------
+# Conversion helpers
+# ---------------------------------------------------------------------------
+
+
+def to_ns(value: datetime) -> int:
+    """Return an aware datetime as integer nanoseconds since the Unix epoch."""
+    return (value - _EPOCH) // _ONE_MICROSECOND * 1_000
+
+
+def to_arrays(pairs: Iterable[tuple[datetime, datetime]]):
+    """
+    Convert (start_utc, end_utc) pairs into a struct-of-arrays of int64 nanoseconds.
+
+    Args:
+        pairs: Iterable of aware (start, end) datetimes, e.g. from
+               `values_list("shift__start_utc", "shift__end_utc")`.
+
+    Returns:
+        Tuple (starts, ends) — numpy int64 arrays when Numba is available,
+        plain lists otherwise.
+    """
+    starts, ends = [], []
+    for start, end in pairs:
+        starts.append(to_ns(start))
+        ends.append(to_ns(end))
+    return as_int64_array(starts), as_int64_array(ends)
+
+
+def as_int64_array(values: list[int]):
+    """Return values as an int64 numpy array on the compiled path, else unchanged."""
+    if HAS_NUMBA:
+        return np.asarray(values, dtype=np.int64)
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Kernels
+# ---------------------------------------------------------------------------
+
+
+@njit(cache=True)
+def rest_gap_conflict(starts, ends, new_start, new_end, min_rest_ns):
+    """
+    Return the index of the first assignment violating the minimum rest gap, or -1.
+
+    Used by check_minimum_rest: an existing shift ending in
+    (new_start - min_rest, new_start] or starting in [new_end, new_end + min_rest)
+    is too close to the proposed shift.
+    """
+    for i in range(len(starts)):
+        if new_start - min_rest_ns < ends[i] <= new_start:
+            return i
+        if new_end <= starts[i] < new_end + min_rest_ns:
+            return i
+    return -1
+
+
+@njit(cache=True)
+def daily_hours_sum(starts, ends, day_start_ns, day_end_ns):
+    """Return the total hours of assignments starting within [day_start, day_end)."""
+    total = 0
+    for i in range(len(starts)):
+        if day_start_ns <= starts[i] < day_end_ns:
+            total += ends[i] - starts[i]
+    return total / NS_PER_HOUR
+
+
+@njit(cache=True)
+def local_day_index(starts, tz_offsets, week_start, out):
+    """
+    Fill out[i] with the local week-day index (0 = week start) of shift i.
+
+    Args:
+        starts: Shift starts as UTC nanoseconds.
+        tz_offsets: Per-shift UTC offset of the shift's location, in nanoseconds.
+        week_start: Local midnight of the first day of the week, as naive
+                    nanoseconds (i.e. UTC nanoseconds with no offset applied).
+        out: Preallocated array (or list) of the same length; written in place.
+    """
+    for i in range(len(starts)):
+        out[i] = (starts[i] + tz_offsets[i] - week_start) // NS_PER_DAY
+
+
+def consecutive_days_before(day_ordinals: Iterable[int], shift_day_ordinal: int) -> int:
+    """
+    Count the unbroken run of worked days immediately before shift_day_ordinal.
+
+    Bit i of an 8-bit mask is set when the user worked on (shift day - i - 1);
+    the run length is then the number of trailing one bits, read off the lowest
+    clear bit of the mask without walking day by day.
+
+    Args:
+        day_ordinals: Date ordinals (date.toordinal()) on which the user works,
+                      in any order; duplicates and days outside the 8-day
+                      lookback are ignored.
+        shift_day_ordinal: Ordinal of the proposed shift's date.
+
+    Returns:
+        Number of consecutive worked days ending the day before the shift (0–8).
+    """
+    mask = 0
+    for day in day_ordinals:
+        bit = shift_day_ordinal - int(day) - 1
+        if 0 <= bit < 8:
+            mask |= 1 << bit
+    inv = ~mask & 0x1FF  # bit 8 guarantees a clear bit when all eight days are worked
+    return (inv & -inv).bit_length() - 1
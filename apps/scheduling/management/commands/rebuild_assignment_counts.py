@@ -0,0 +1,33 @@
+"""
+Recompute Shift.active_assignment_count from the assignment rows.
+
+The counter is maintained by signals, so writes that bypass them (raw SQL,
+queryset.update() on statuses, fixtures) can leave it stale. This command
+recounts every shift and saves only the ones that drifted.
+
+Usage:
+    python manage.py rebuild_assignment_counts
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored active assignment count on every shift"
+
+    def handle(self, *args, **options):
+        from apps.scheduling.models import Shift
+
+        shifts = Shift.objects.with_assignment_counts().only("pk", "active_assignment_count").order_by()
+        stale = []
+        with transaction.atomic():
+            for shift in shifts.iterator(chunk_size=BATCH_SIZE):
+                if shift.active_assignment_count != shift._assigned_count:
+                    shift.active_assignment_count = shift._assigned_count
+                    stale.append(shift)
+            Shift.objects.bulk_update(stale, ["active_assignment_count"], batch_size=BATCH_SIZE)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {len(stale)} shift(s)."))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-15 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="swaprequest",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["pending_pickup", "pending_acceptance"])
+                ),
+                fields=["expires_at"],
+                name="swap_pending_expiry_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="swaprequest",
+            index=models.Index(
+                condition=models.Q(
+                    ("request_type", "swap"), ("status", "pending_acceptance")
+                ),
+                fields=["created_at"],
+                name="swap_pending_accept_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.28 on 2026-10-15 22:44
+
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_premium_cached(apps, schema_editor):
+    """Compute premium_cached for existing shifts (mirrors Shift.is_premium)."""
+    Shift = apps.get_model("scheduling", "Shift")
+    config = settings.SHIFTSYNC
+    premium_ids = []
+    shifts = Shift.objects.select_related("location").only("start_utc", "location__timezone")
+    for shift in shifts.iterator(chunk_size=2000):
+        start_local = shift.start_utc.astimezone(ZoneInfo(shift.location.timezone))
+        if (
+            start_local.weekday() in config["PREMIUM_SHIFT_DAYS"]
+            and start_local.hour >= config["PREMIUM_SHIFT_START_HOUR"]
+        ):
+            premium_ids.append(shift.pk)
+    Shift.objects.filter(pk__in=premium_ids).update(premium_cached=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0002_swaprequest_pending_expiry_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shift",
+            name="premium_cached",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="Denormalised is_premium; maintained automatically on save.",
+            ),
+        ),
+        migrations.RunPython(backfill_premium_cached, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-15 22:46
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_active_assignment_count(apps, schema_editor):
+    """Count each shift's assigned/swap_pending rows into the new column."""
+    Shift = apps.get_model("scheduling", "Shift")
+    shifts = Shift.objects.annotate(
+        active=Count("assignments", filter=Q(assignments__status__in=["assigned", "swap_pending"]))
+    ).filter(active__gt=0)
+    stale = []
+    for shift in shifts.only("pk").iterator(chunk_size=2000):
+        shift.active_assignment_count = shift.active
+        stale.append(shift)
+    Shift.objects.bulk_update(stale, ["active_assignment_count"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0003_shift_premium_cached"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shift",
+            name="active_assignment_count",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_assignment_count, migrations.RunPython.noop),
+    ]
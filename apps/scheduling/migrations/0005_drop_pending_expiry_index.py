@@ -0,0 +1,27 @@
+# Generated by Django 4.2.28 on 2026-10-15 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0004_shift_active_assignment_count"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="swaprequest",
+            name="swap_pending_expiry_idx",
+        ),
+        migrations.AddIndex(
+            model_name="swaprequest",
+            index=models.Index(
+                condition=models.Q(
+                    ("request_type", "drop"), ("status", "pending_pickup")
+                ),
+                fields=["expires_at"],
+                name="drop_pending_expiry_idx",
+            ),
+        ),
+    ]
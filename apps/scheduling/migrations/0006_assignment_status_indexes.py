@@ -0,0 +1,25 @@
+# Generated by Django 4.2.28 on 2026-10-15 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0005_drop_pending_expiry_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shiftassignment",
+            index=models.Index(
+                fields=["user", "status"], name="scheduling__user_id_9da4d6_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shiftassignment",
+            index=models.Index(
+                fields=["shift", "status"], name="scheduling__shift_i_77d824_idx"
+            ),
+        ),
+    ]
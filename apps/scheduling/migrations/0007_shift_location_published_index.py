@@ -0,0 +1,20 @@
+# Generated by Django 4.2.28 on 2026-10-15 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0006_assignment_status_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(
+                fields=["location", "is_published", "start_utc"],
+                name="scheduling__locatio_a1946c_idx",
+            ),
+        ),
+    ]
@@ -12,12 +12,95 @@ timezone. This is enforced by using `datetime` with `timezone.now()` everywhere,
 never `datetime.now()`.
 """
 
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, Func, Q, Sum
+from django.db.models.functions import Now
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
+class _HoursInterval(Func):
+    """
+    An integer hours expression as a duration.
+
+    PostgreSQL gets a native interval; SQLite and MySQL store durations as
+    integer microseconds, so the generic form multiplies out to that.
+    """
+
+    template = "(%(expressions)s * 3600000000)"
+    output_field = DurationField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="make_interval(hours => %(expressions)s)")
+
+
+class ShiftQuerySet(models.QuerySet):
+    """Query helpers for Shift."""
+
+    def with_assignment_counts(self) -> "ShiftQuerySet":
+        """
+        Annotate each shift with its active assignment count.
+
+        Counted live from the assignment rows; Shift.assigned_count (and so
+        is_fully_staffed) prefers the annotation over the stored counter.
+        """
+        return self.annotate(
+            _assigned_count=Count(
+                "assignments",
+                filter=Q(assignments__status__in=ShiftAssignment.ACTIVE_STATUSES),
+            )
+        )
+
+    def understaffed(self) -> "ShiftQuerySet":
+        """
+        Restrict to published shifts with open places.
+
+        SQL counterpart of "is_published and not is_fully_staffed", read from
+        the stored active_assignment_count.
+        """
+        return self.filter(is_published=True, active_assignment_count__lt=F("headcount_needed"))
+
+    def editable(self, now=None) -> "ShiftQuerySet":
+        """
+        Restrict to shifts still before their edit cutoff.
+
+        SQL counterpart of Shift.is_past_edit_cutoff, so "which shifts can I
+        still edit?" is answered by the database instead of a Python loop.
+
+        Args:
+            now: Reference time; defaults to the database's NOW().
+        """
+        return self.annotate(
+            _edit_cutoff=ExpressionWrapper(
+                F("start_utc") - _HoursInterval("edit_cutoff_hours"), output_field=DateTimeField()
+            )
+        ).filter(_edit_cutoff__gt=now if now is not None else Now())
+
+
+class ShiftAssignmentQuerySet(models.QuerySet):
+    """Query helpers for ShiftAssignment."""
+
+    _SHIFT_DURATION = ExpressionWrapper(F("shift__end_utc") - F("shift__start_utc"), output_field=DurationField())
+
+    def durations_by_user(self) -> "ShiftAssignmentQuerySet":
+        """
+        Group by user, summing the duration of each user's assigned shifts.
+
+        SQL counterpart of summing Shift.duration_hours per user in Python:
+        yields one {"user_id", "total_duration"} row per user (a timedelta),
+        and can be filtered on total_duration (a HAVING clause).
+        """
+        return self.order_by().values("user_id").annotate(total_duration=Sum(self._SHIFT_DURATION))
+
+    def total_duration(self) -> timedelta:
+        """Sum the duration of the assigned shifts in one aggregate query (zero if none)."""
+        return self.aggregate(total=Sum(self._SHIFT_DURATION))["total"] or timedelta()
+
+
 class Shift(models.Model):
     """
     A scheduled work block at a restaurant location.
@@ -78,6 +161,18 @@ class Shift(models.Model):
     # Notes visible to assigned staff
     notes = models.TextField(blank=True)
 
+    # Stored copy of is_premium, refreshed on every save (see signals.py) so
+    # premium shifts can be filtered in SQL
+    premium_cached = models.BooleanField(
+        default=False,
+        db_index=True,
+        help_text="Denormalised is_premium; maintained automatically on save.",
+    )
+
+    # Number of ACTIVE_STATUSES assignments, kept in step by the ShiftAssignment
+    # signals (see signals.py); `manage.py rebuild_assignment_counts` repairs drift
+    active_assignment_count = models.PositiveSmallIntegerField(default=0, editable=False)
+
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -87,6 +182,8 @@ class Shift(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ShiftQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Shift"
         verbose_name_plural = "Shifts"
@@ -94,6 +191,9 @@ class Shift(models.Model):
         indexes = [
             models.Index(fields=["location", "start_utc"]),
             models.Index(fields=["start_utc", "end_utc"]),
+            # Published-only (staff schedule, open shifts) and draft-only (publish
+            # week) reads take the start_utc range after both equality columns
+            models.Index(fields=["location", "is_published", "start_utc"]),
         ]
 
     def __str__(self) -> str:
@@ -103,19 +203,44 @@ class Shift(models.Model):
             f"{self.start_utc.strftime('%Y-%m-%d %H:%M')} UTC"
         )
 
+    def save(self, *args, update_fields=None, **kwargs):
+        """
+        Save the shift, leaving active_assignment_count alone unless asked.
+
+        The counter is moved by F() updates from the assignment signals, so a
+        full save of an instance loaded earlier (e.g. the admin change form)
+        would write back a stale count. Updates of an existing row therefore
+        skip the column unless it is named in update_fields.
+        """
+        if update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name != "active_assignment_count"
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     @property
     def duration_hours(self) -> float:
         """Calculate the total duration of the shift in decimal hours."""
         delta = self.end_utc - self.start_utc
         return delta.total_seconds() / 3600
 
+    @cached_property
+    def start_local(self):
+        """Shift start in the location's timezone (cached per instance)."""
+        return self.start_utc.astimezone(self.location.get_zoneinfo())
+
+    @cached_property
+    def end_local(self):
+        """Shift end in the location's timezone (cached per instance)."""
+        return self.end_utc.astimezone(self.location.get_zoneinfo())
+
     @property
     def is_overnight(self) -> bool:
         """Return True if the shift crosses a local midnight boundary."""
-        local_tz = self.location.get_zoneinfo()
-        start_local = self.start_utc.astimezone(local_tz)
-        end_local = self.end_utc.astimezone(local_tz)
-        return start_local.date() != end_local.date()
+        return self.start_local.date() != self.end_local.date()
 
     @property
     def is_premium(self) -> bool:
@@ -126,8 +251,7 @@ class Shift(models.Model):
         The day is evaluated in the location's local timezone.
         """
         config = settings.SHIFTSYNC
-        local_tz = self.location.get_zoneinfo()
-        start_local = self.start_utc.astimezone(local_tz)
+        start_local = self.start_local
         return (
             start_local.weekday() in config["PREMIUM_SHIFT_DAYS"]
             and start_local.hour >= config["PREMIUM_SHIFT_START_HOUR"]
@@ -140,15 +264,21 @@ class Shift(models.Model):
 
         Shifts are locked for editing edit_cutoff_hours before they start.
         """
-        cutoff = self.start_utc - timezone.timedelta(hours=self.edit_cutoff_hours)
+        cutoff = self.start_utc - timedelta(hours=self.edit_cutoff_hours)
         return timezone.now() >= cutoff
 
     @property
     def assigned_count(self) -> int:
-        """Return the number of currently active (non-cancelled) assignments."""
-        return self.assignments.filter(
-            status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING]
-        ).count()
+        """
+        Return the number of currently active (non-cancelled) assignments.
+
+        Uses the with_assignment_counts() annotation when present, otherwise
+        the stored active_assignment_count — no query either way.
+        """
+        annotated = getattr(self, "_assigned_count", None)
+        if annotated is not None:
+            return annotated
+        return self.active_assignment_count
 
     @property
     def is_fully_staffed(self) -> bool:
@@ -168,6 +298,11 @@ class Shift(models.Model):
         self.save(update_fields=["is_published", "published_at", "published_by"])
 
 
+# Assignment statuses that hold a place on the shift. Module-level so the
+# UniqueConstraint in ShiftAssignment.Meta can reference it too.
+_ACTIVE_ASSIGNMENT_STATUSES = ("assigned", "swap_pending")
+
+
 class ShiftAssignment(models.Model):
     """
     Links a staff member to a shift they are assigned to work.
@@ -189,6 +324,9 @@ class ShiftAssignment(models.Model):
         COVERED = "covered", _("Covered (swap out)")
         DROPPED = "dropped", _("Dropped")
 
+    # Statuses that count towards headcount (and the one-active-per-shift rule)
+    ACTIVE_STATUSES = _ACTIVE_ASSIGNMENT_STATUSES
+
     shift = models.ForeignKey(Shift, on_delete=models.CASCADE, related_name="assignments")
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -205,6 +343,8 @@ class ShiftAssignment(models.Model):
     assigned_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ShiftAssignmentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Shift Assignment"
         verbose_name_plural = "Shift Assignments"
@@ -212,19 +352,29 @@ class ShiftAssignment(models.Model):
             # A staff member can only have one active assignment per shift
             models.UniqueConstraint(
                 fields=["shift", "user"],
-                condition=models.Q(status__in=["assigned", "swap_pending"]),
+                condition=models.Q(status__in=list(_ACTIVE_ASSIGNMENT_STATUSES)),
                 name="unique_active_assignment_per_shift",
             )
         ]
         indexes = [
             models.Index(fields=["user", "shift"]),
             models.Index(fields=["status"]),
+            # A user's active assignments (hours, rest, double booking) and a
+            # shift's active assignments (headcount) are filtered on status
+            models.Index(fields=["user", "status"]),
+            models.Index(fields=["shift", "status"]),
         ]
 
     def __str__(self) -> str:
         """Return a readable description of this assignment."""
         return f"{self.user.get_full_name()} → {self.shift} [{self.get_status_display()}]"
 
+    def refresh_from_db(self, using=None, fields=None):
+        """Reload from the database, resetting the status the counter signals compare against."""
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or "status" in fields:
+            self._loaded_status = self.status
+
 
 class SwapRequest(models.Model):
     """
@@ -260,6 +410,10 @@ class SwapRequest(models.Model):
         CANCELLED = "cancelled", _("Cancelled")
         EXPIRED = "expired", _("Expired")
 
+    # Unresolved requests (count towards MAX_PENDING_SWAP_REQUESTS) and final ones
+    PENDING_STATUSES = frozenset({Status.PENDING_ACCEPTANCE, Status.PENDING_PICKUP, Status.PENDING_MANAGER})
+    TERMINAL_STATUSES = frozenset({Status.APPROVED, Status.REJECTED, Status.CANCELLED, Status.EXPIRED})
+
     # Staff A: the person initiating the swap/drop
     requester = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -326,6 +480,18 @@ class SwapRequest(models.Model):
             models.Index(fields=["status"]),
             models.Index(fields=["requester", "status"]),
             models.Index(fields=["expires_at"]),
+            # Partial indexes keep the expiry sweeps (see tasks.py) on pending rows only;
+            # each condition repeats its sweep's equality filters so the planner can match it
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(status="pending_pickup", request_type="drop"),
+                name="drop_pending_expiry_idx",
+            ),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="pending_acceptance", request_type="swap"),
+                name="swap_pending_accept_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -339,11 +505,12 @@ class SwapRequest(models.Model):
     @property
     def is_pending(self) -> bool:
         """Return True if this request is still in a pending (unresolved) state."""
-        return self.status in [
-            self.Status.PENDING_ACCEPTANCE,
-            self.Status.PENDING_PICKUP,
-            self.Status.PENDING_MANAGER,
-        ]
+        return self.status in SwapRequest.PENDING_STATUSES
+
+    @property
+    def is_terminal(self) -> bool:
+        """Return True if this request has reached a final state."""
+        return self.status in SwapRequest.TERMINAL_STATUSES
 
 
 class ManagerOverride(models.Model):
@@ -1,6 +1,12 @@
+from collections import Counter
+
 from django.db import transaction
-from apps.scheduling.models import ShiftAssignment
-from apps.scheduling.constraints import ConstraintEngine, ConstraintResult
+from django.db.models import F
+from apps.accounts.models import User
+from apps.audit.models import AuditLog
+from apps.notifications.models import Notification
+from apps.scheduling.models import Shift, ShiftAssignment
+from apps.scheduling.constraints import ASSIGNMENT_CHECKS, ConstraintEngine, ConstraintResult
 
 
 class ShiftAssignmentService:
@@ -14,11 +20,21 @@ class ShiftAssignmentService:
     """
 
     @staticmethod
-    @transaction.atomic
     def assign(user, shift, assigned_by):
         """
         Attempt to assign a user to a shift.
 
+        The full pipeline runs first, unlocked (ConstraintEngine.check opens
+        its own atomic block, a savepoint under ATOMIC_REQUESTS). The insert
+        then takes SELECT FOR UPDATE on the user's row, so concurrent assigns
+        of the same staff member queue up there, and re-runs every check that
+        reads that user's other assignments (ASSIGNMENT_CHECKS: double
+        booking, rest, daily and weekly hours, consecutive days) before
+        inserting. Two managers assigning one person at once therefore can't
+        both get past a limit the pair would break; the slower one gets the
+        conflict. Skill, certification and availability don't depend on
+        assignments and are not repeated.
+
         Args:
             user: The staff member being assigned
             shift: The shift instance
@@ -31,9 +47,97 @@ class ShiftAssignmentService:
         if not result.ok:
             return {"success": False, "result": result}
 
-        assignment = ShiftAssignment.objects.create(
-            shift=shift,
-            user=user,
-            assigned_by=assigned_by,
-        )
+        with transaction.atomic():
+            User.objects.select_for_update().only("pk").get(pk=user.pk)
+            for check_fn in ASSIGNMENT_CHECKS:
+                result = check_fn(user, shift)
+                if not result.ok:
+                    return {"success": False, "result": result}
+            assignment = ShiftAssignment.objects.create(
+                shift=shift,
+                user=user,
+                assigned_by=assigned_by,
+            )
         return {"success": True, "assignment": assignment}
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_assign(pairs, assigned_by):
+        """
+        Assign many (user, shift) pairs at once, e.g. when staffing a whole week.
+
+        Each pair still runs the full constraint pipeline. Accepted assignments
+        are inserted with bulk_create, which does not send post_save, so the
+        per-row audit/notification tasks are replaced by one AuditLog and one
+        Notification bulk_create for the whole batch, and each shift's
+        active_assignment_count is bumped once.
+
+        The pending batch is flushed whenever a user repeats, so later checks
+        for that user see their earlier assignments (double booking, rest,
+        daily/weekly hours). Pairs already assigned, or repeated in the input,
+        are skipped.
+
+        Args:
+            pairs: Iterable of (user, shift); shifts should have location and
+                   required_skill loaded, as they appear in notification text.
+            assigned_by: The manager/admin performing the assignments.
+
+        Returns:
+            dict with the created assignments and a list of conflicts, each a
+            dict of user, shift and the blocking ConstraintResult.
+        """
+        pairs = list(pairs)
+        seen = set(
+            ShiftAssignment.objects.filter(
+                status__in=ShiftAssignment.ACTIVE_STATUSES,
+                shift_id__in={shift.pk for _, shift in pairs},
+                user_id__in={user.pk for user, _ in pairs},
+            ).values_list("user_id", "shift_id")
+        )
+
+        created, conflicts = [], []
+        pending, pending_users = [], set()
+        for user, shift in pairs:
+            if (user.pk, shift.pk) in seen:
+                continue
+            seen.add((user.pk, shift.pk))
+
+            if user.pk in pending_users:
+                created += ShiftAssignment.objects.bulk_create(pending)
+                pending, pending_users = [], set()
+
+            result = ConstraintEngine.check(user, shift)
+            if not result.ok:
+                conflicts.append({"user": user, "shift": shift, "result": result})
+                continue
+            pending.append(ShiftAssignment(shift=shift, user=user, assigned_by=assigned_by))
+            pending_users.add(user.pk)
+        created += ShiftAssignment.objects.bulk_create(pending)
+
+        shifts = {shift.pk: shift for _, shift in pairs}
+        for shift_id, added in Counter(a.shift_id for a in created).items():
+            Shift.objects.filter(pk=shift_id).update(
+                active_assignment_count=F("active_assignment_count") + added
+            )
+            shifts[shift_id].active_assignment_count += added
+
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                actor=assigned_by,
+                action="shift_assignment.created",
+                content_object=assignment,
+                after={"shift": assignment.shift_id, "user": assignment.user_id},
+            )
+            for assignment in created
+        ])
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=assignment.user_id,
+                notification_type=Notification.Type.SHIFT_ASSIGNED,
+                title="New Shift Assigned",
+                body=f"You have been assigned to {assignment.shift}",
+                data={"shift_id": assignment.shift_id},
+            )
+            for assignment in created
+        ])
+        return {"assignments": created, "conflicts": conflicts}
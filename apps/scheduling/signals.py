@@ -1,67 +1,160 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
-from apps.scheduling.models import ManagerOverride, ShiftAssignment, SwapRequest
+from apps.accounts.models import User
 from apps.audit.models import AuditLog
-from apps.notifications.models import Notification
+from apps.locations.models import Location, LocationCertification
+from apps.scheduling.cache import invalidate_admin_fragments, invalidate_on_duty_cache
+from apps.scheduling.constraints import invalidate_suggestion_cache
+from apps.scheduling.models import ManagerOverride, Shift, ShiftAssignment, SwapRequest
+from apps.notifications.tasks import (
+    record_assignment_audit,
+    record_manager_override_audit,
+    record_swap_request_audit,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _delay_on_commit(task, object_id: int) -> None:
+    """
+    Queue task.delay(object_id) once the current transaction commits.
+
+    By then the row is committed, so a broker outage is logged rather than
+    raised — like _ws_broadcast, infrastructure failures must never turn a
+    successful request into a 500.
+    """
+    def send():
+        try:
+            task.delay(object_id)
+        except Exception:
+            logger.exception("Could not queue %s for object %d", task.name, object_id)
+
+    transaction.on_commit(send)
+
+
+@receiver(pre_save, sender=Shift)
+def cache_shift_premium(sender, instance, **kwargs):
+    """Store the current is_premium value so premium shifts can be filtered in SQL."""
+    instance.__dict__.pop("start_local", None)  # start_utc or location may have changed
+    instance.premium_cached = instance.is_premium
+
+
+def _adjust_active_count(assignment, delta: int) -> None:
+    """Apply delta to the assignment's shift counter, in the DB and on a loaded shift."""
+    Shift.objects.filter(pk=assignment.shift_id).update(
+        active_assignment_count=F("active_assignment_count") + delta
+    )
+    if ShiftAssignment.shift.is_cached(assignment):
+        assignment.shift.active_assignment_count += delta
+
+
+# Stands in for the loaded status when the instance was fetched with status deferred
+_STATUS_DEFERRED = object()
+
+
+@receiver(post_init, sender=ShiftAssignment)
+def remember_assignment_status(sender, instance, **kwargs):
+    """Remember the status as loaded so post_save can tell which way it moved."""
+    if not instance.pk:
+        instance._loaded_status = None
+    else:
+        instance._loaded_status = instance.__dict__.get("status", _STATUS_DEFERRED)
+
+
+@receiver(pre_save, sender=ShiftAssignment)
+def load_deferred_assignment_status(sender, instance, raw=False, **kwargs):
+    """Read the stored status before an update that sets it, if it was deferred at load time."""
+    if not raw and instance._loaded_status is _STATUS_DEFERRED and "status" in instance.__dict__:
+        instance._loaded_status = (
+            ShiftAssignment.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ShiftAssignment)
+def track_active_assignment_count(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep Shift.active_assignment_count in step as assignments enter or leave ACTIVE_STATUSES."""
+    if raw:
+        return  # fixtures: run rebuild_assignment_counts afterwards
+    if update_fields is not None and "status" not in update_fields:
+        return  # the stored status didn't change
+    was_active = not created and instance._loaded_status in ShiftAssignment.ACTIVE_STATUSES
+    is_active = instance.status in ShiftAssignment.ACTIVE_STATUSES
+    instance._loaded_status = instance.status
+    if was_active != is_active:
+        _adjust_active_count(instance, 1 if is_active else -1)
+
+
+@receiver(post_delete, sender=ShiftAssignment)
+def release_active_assignment_count(sender, instance, **kwargs):
+    """Decrement the shift counter when an active assignment is deleted."""
+    if instance.status in ShiftAssignment.ACTIVE_STATUSES:
+        _adjust_active_count(instance, -1)
 
 
 @receiver(post_save, sender=ShiftAssignment)
 def log_assignment(sender, instance, created, **kwargs):
-    """Create audit log and notification when a shift assignment is made."""
+    """Queue the audit log and notification for a new shift assignment once it commits."""
     if created:
-        # Audit log entry
-        AuditLog.objects.create(
-            actor=instance.assigned_by,
-            action="shift_assignment.created",
-            content_object=instance,
-            after={"shift": instance.shift.id, "user": instance.user.id},
-        )
-
-        # Notification to staff
-        Notification.objects.create(
-            recipient=instance.user,
-            notification_type=Notification.Type.SHIFT_ASSIGNED,
-            title="New Shift Assigned",
-            body=f"You have been assigned to {instance.shift}",
-            data={"shift_id": instance.shift.id},
-        )
+        _delay_on_commit(record_assignment_audit, instance.pk)
 
 
 @receiver(post_save, sender=SwapRequest)
 def log_swap_request(sender, instance, created, **kwargs):
-    """Audit and notify when a swap/drop request is created."""
+    """Queue the audit log and notification for a new swap/drop request once it commits."""
     if created:
-        AuditLog.objects.create(
-            actor=instance.requester,
-            action=f"swap_request.{instance.request_type}.created",
-            content_object=instance,
-            after={"assignment": instance.assignment.id, "status": instance.status},
-        )
-
-        Notification.objects.create(
-            recipient=instance.assignment.user,
-            notification_type=Notification.Type.SWAP_REQUEST_RECEIVED,
-            title="Swap Request Received",
-            body=f"{instance.requester.get_full_name()} requested a swap for {instance.assignment.shift}",
-            data={"swap_request_id": instance.id},
-        )
+        _delay_on_commit(record_swap_request_audit, instance.pk)
 
 
 @receiver(post_save, sender=ManagerOverride)
 def log_manager_override(sender, instance, created, **kwargs):
-    """Audit and notify when a manager override is created."""
+    """Queue the audit log and notification for a manager override once it commits."""
     if created:
-        AuditLog.objects.create(
-            actor=instance.manager,
-            action="manager_override.created",
-            content_object=instance,
-            after={"assignment": instance.assignment.id, "reason": instance.reason},
-        )
+        _delay_on_commit(record_manager_override_audit, instance.pk)
 
-        Notification.objects.create(
-            recipient=instance.assignment.user,
-            notification_type=Notification.Type.SHIFT_CHANGED,
-            title="Manager Override",
-            body=f"Your shift assignment was overridden by {instance.manager.get_full_name()}",
-            data={"override_id": instance.id},
-        )
+
+@receiver(post_save, sender=LocationCertification)
+@receiver(post_delete, sender=LocationCertification)
+@receiver(m2m_changed, sender=User.skills.through)
+def invalidate_constraint_suggestions(sender, **kwargs):
+    """Drop cached constraint suggestions when certifications or skills change."""
+    invalidate_suggestion_cache()
+
+
+# The User columns the suggestion query filters on or displays
+_SUGGESTION_USER_FIELDS = frozenset({"role", "is_active", "first_name", "last_name"})
+
+
+@receiver(post_save, sender=User)
+def invalidate_suggestions_for_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop cached constraint suggestions when a user's role, status or name may have changed.
+
+    Partial saves that touch none of those (e.g. the last_login update on every
+    login) leave the cache alone.
+    """
+    if update_fields is not None and not _SUGGESTION_USER_FIELDS.intersection(update_fields):
+        return
+    invalidate_suggestion_cache()
+
+
+@receiver(post_save, sender=ShiftAssignment)
+@receiver(post_delete, sender=ShiftAssignment)
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+@receiver(post_save, sender=Location)
+@receiver(m2m_changed, sender=Location.managers.through)
+def invalidate_on_duty_partials(sender, **kwargs):
+    """Drop cached on-duty partials when who works where, and when, changes."""
+    invalidate_on_duty_cache()
+
+
+@receiver(post_save, sender=SwapRequest)
+@receiver(post_delete, sender=SwapRequest)
+@receiver(post_save, sender=AuditLog)
+def invalidate_admin_dashboard_fragments(sender, **kwargs):
+    """Drop the cached admin approvals/activity cards when swaps or the audit log change."""
+    invalidate_admin_fragments()
@@ -14,16 +14,180 @@ Design notes:
   - We avoid select_for_update here because Django Celery Beat workers are
     single-threaded by default; add it if horizontal scaling is needed.
   - A logger record is emitted per batch so ops can trace spikes in expiries.
+  - Expiry reads flat values_list() rows, never model instances.
+  - The read streams with iterator(), EXPIRY_CHUNK_SIZE rows at a time.
+  - Each chunk runs the expire/restore UPDATEs and one AuditLog bulk INSERT.
+  - All chunks of a run share one transaction.
+  - On PostgreSQL those UPDATEs are one CTE statement; elsewhere two UPDATEs.
+  - Requests whose status changed since the read are skipped.
+  - save() and its post_save handlers are bypassed; they only act on creation.
 """
 
 import logging
 from datetime import timedelta
+from itertools import islice
 
 from celery import shared_task
+from django.db import connection, transaction
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched (and expired) per round trip in the expiry sweeps
+EXPIRY_CHUNK_SIZE = 500
+
+
+# Flat columns read per expiring request; enough to expire it and write its audit note
+_EXPIRY_FIELDS = (
+    "id",
+    "assignment_id",
+    "status",
+    "request_type",
+    "requester__first_name",
+    "requester__last_name",
+    "assignment__user__first_name",
+    "assignment__user__last_name",
+    "assignment__shift__location__name",
+    "assignment__shift__start_utc",
+)
+
+
+def _full_name(first_name: str, last_name: str) -> str:
+    """Match User.get_full_name() for values read without a User instance."""
+    return f"{first_name} {last_name}".strip()
+
+
+def _expiry_note(row) -> str:
+    """Return the audit note for an expired swap/drop request row (see _EXPIRY_FIELDS)."""
+    from apps.scheduling.models import SwapRequest
+
+    return (
+        f"{SwapRequest.Type(row.request_type).label} requested by "
+        f"{_full_name(row.requester__first_name, row.requester__last_name)} for "
+        f"{_full_name(row.assignment__user__first_name, row.assignment__user__last_name)}'s "
+        f"shift at {row.assignment__shift__location__name} on "
+        f"{row.assignment__shift__start_utc.strftime('%Y-%m-%d %H:%M')} UTC expired without a response."
+    )
+
+
+def _expire_and_restore_sql(ids: list[int], statuses: list[str], now) -> set[int]:
+    """
+    Expire the requests and restore their assignments in one PostgreSQL statement.
+
+    A data-modifying CTE runs both UPDATEs in a single round trip. The status
+    is re-checked at write time, so a request accepted, picked up or cancelled
+    since the chunk was read is left alone, as is its assignment, and is not
+    returned.
+
+    Args:
+        ids: Primary keys of the SwapRequests to expire.
+        statuses: Statuses the requests were read in; others are skipped.
+        now: Timestamp written to updated_at.
+
+    Returns:
+        Ids of the requests that were expired.
+    """
+    from apps.scheduling.models import ShiftAssignment, SwapRequest
+
+    quote = connection.ops.quote_name
+    sql = f"""
+        WITH expired AS (
+            UPDATE {quote(SwapRequest._meta.db_table)}
+            SET status = %s, updated_at = %s
+            WHERE id = ANY(%s) AND status = ANY(%s)
+            RETURNING id, assignment_id
+        ), restored AS (
+            UPDATE {quote(ShiftAssignment._meta.db_table)}
+            SET status = %s, updated_at = %s
+            WHERE id IN (SELECT assignment_id FROM expired)
+        )
+        SELECT id FROM expired
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            SwapRequest.Status.EXPIRED, now, ids, statuses,
+            ShiftAssignment.Status.ASSIGNED, now,
+        ])
+        return {pk for (pk,) in cursor.fetchall()}
+
+
+def _expire_batch(rows: list, now) -> int:
+    """
+    Mark one chunk of swap/drop requests EXPIRED, restore their assignments and audit each one.
+
+    On PostgreSQL both writes go out as one statement (see
+    _expire_and_restore_sql); other backends use two ORM UPDATEs with a
+    SELECT between them for the ids that were expired. Either way a request
+    whose status changed since the chunk was read is skipped and not audited.
+
+    Args:
+        rows: Named value rows with the columns in _EXPIRY_FIELDS.
+        now: Timestamp written to updated_at.
+
+    Returns:
+        Number of requests expired.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from apps.audit.models import AuditLog
+    from apps.scheduling.models import ShiftAssignment, SwapRequest
+
+    ids = [row.id for row in rows]
+    statuses = sorted({row.status for row in rows})
+    if connection.vendor == "postgresql":
+        expired_ids = _expire_and_restore_sql(ids, statuses, now)
+        rows = [row for row in rows if row.id in expired_ids]
+    else:
+        SwapRequest.objects.filter(id__in=ids, status__in=statuses).update(
+            status=SwapRequest.Status.EXPIRED, updated_at=now
+        )
+        # Only our own UPDATE writes EXPIRED with this exact timestamp
+        expired_ids = set(SwapRequest.objects.filter(
+            id__in=ids, status=SwapRequest.Status.EXPIRED, updated_at=now
+        ).values_list("id", flat=True))
+        rows = [row for row in rows if row.id in expired_ids]
+        # Restore the original assignments so the staff members stay on their shifts
+        ShiftAssignment.objects.filter(id__in=[row.assignment_id for row in rows]).update(
+            status=ShiftAssignment.Status.ASSIGNED, updated_at=now
+        )
+    content_type = ContentType.objects.get_for_model(SwapRequest)
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            actor=None,  # system action
+            action="swap_request.expired",
+            content_type=content_type,
+            object_id=row.id,
+            before={"status": row.status},
+            after={"status": SwapRequest.Status.EXPIRED},
+            note=_expiry_note(row),
+        )
+        for row in rows
+    ])
+    return len(rows)
+
+
+def _expire_requests(expired_qs) -> int:
+    """
+    Expire the given swap/drop requests, EXPIRY_CHUNK_SIZE rows at a time.
+
+    Args:
+        expired_qs: SwapRequest queryset selecting the requests to expire.
+
+    Returns:
+        Number of requests expired.
+    """
+    now = timezone.now()
+    rows = (
+        expired_qs.order_by()
+        .values_list(*_EXPIRY_FIELDS, named=True)
+        .iterator(chunk_size=EXPIRY_CHUNK_SIZE)
+    )
+    count = 0
+    with transaction.atomic():
+        while batch := list(islice(rows, EXPIRY_CHUNK_SIZE)):
+            count += _expire_batch(batch, now)
+    return count
+
 
 @shared_task(name="scheduling.expire_drop_requests")
 def expire_drop_requests() -> dict:
@@ -40,23 +204,16 @@ def expire_drop_requests() -> dict:
     Returns:
         Dict with count of records expired.
     """
-    from apps.scheduling.models import ShiftAssignment, SwapRequest
+    from apps.scheduling.models import SwapRequest
 
     now = timezone.now()
     expired_qs = SwapRequest.objects.filter(
         request_type=SwapRequest.Type.DROP,
         status=SwapRequest.Status.PENDING_PICKUP,
         expires_at__lt=now,
-    ).select_related("assignment")
+    )
 
-    count = 0
-    for swap in expired_qs:
-        swap.status = SwapRequest.Status.EXPIRED
-        swap.save(update_fields=["status"])
-        # Restore the original assignment so the staff member stays on the shift
-        swap.assignment.status = ShiftAssignment.Status.ASSIGNED
-        swap.assignment.save(update_fields=["status"])
-        count += 1
+    count = _expire_requests(expired_qs)
 
     if count:
         logger.info("Expired %d unclaimed drop request(s).", count)
@@ -75,22 +232,16 @@ def expire_swap_requests() -> dict:
     Returns:
         Dict with count of records expired.
     """
-    from apps.scheduling.models import ShiftAssignment, SwapRequest
+    from apps.scheduling.models import SwapRequest
 
     cutoff = timezone.now() - timedelta(hours=24)
     expired_qs = SwapRequest.objects.filter(
         request_type=SwapRequest.Type.SWAP,
         status=SwapRequest.Status.PENDING_ACCEPTANCE,
         created_at__lt=cutoff,
-    ).select_related("assignment")
+    )
 
-    count = 0
-    for swap in expired_qs:
-        swap.status = SwapRequest.Status.EXPIRED
-        swap.save(update_fields=["status"])
-        swap.assignment.status = ShiftAssignment.Status.ASSIGNED
-        swap.assignment.save(update_fields=["status"])
-        count += 1
+    count = _expire_requests(expired_qs)
 
     if count:
         logger.info("Expired %d unaccepted swap request(s).", count)
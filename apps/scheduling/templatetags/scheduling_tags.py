@@ -1,10 +1,13 @@
 """
-scheduling_tags.py — custom template filters used across ShiftSync templates.
+scheduling_tags.py — custom template filters and tags used across ShiftSync templates.
 
 Filters:
   get_item(d, key)              → d[key], used for dict lookups with a variable key
-  shifts_for_day(grid, day)     → sub-dict of shifts for a given date
+  shifts_for_day(grid, day)     → location_id → shifts dict for a given date
   for_location(day_slice, pk)   → list of shifts for a specific location pk
+
+Tags:
+  shift_css(shift)              → border/badge CSS classes for a schedule shift card
 """
 
 from django import template
@@ -29,26 +32,25 @@ def get_item(dictionary: dict, key):
     """
     if dictionary is None:
         return None
-    return dictionary.get(key)
+    try:
+        return dictionary[key]
+    except (KeyError, TypeError):
+        return None
 
 
 @register.filter
 def shifts_for_day(grid: dict, day) -> dict:
     """
-    Return a sub-dict of grid entries for a specific date.
+    Return the grid's bucket of shifts for a specific date.
 
     Args:
-        grid: Dict keyed by (date, location_id) → list[Shift].
-        day:  A date object to filter by.
+        grid: Nested dict keyed date → location_id → list[Shift].
+        day:  A date object to look up.
 
     Returns:
-        Dict keyed by location_id → list[Shift] for that day.
+        Dict keyed by location_id → list[Shift] for that day (empty if none).
     """
-    result = {}
-    for (d, loc_id), shifts in grid.items():
-        if d == day:
-            result[loc_id] = shifts
-    return result
+    return grid.get(day, {})
 
 
 @register.filter
@@ -57,11 +59,38 @@ def for_location(day_slice: dict, location_id: int) -> list:
     Return the list of shifts for a specific location from a day slice.
 
     Args:
-        day_slice:   Dict keyed by location_id → list[Shift].
-        location_id: The location PK to look up.
+        day_slice:   Dict keyed by location_id → list[Shift]; ScheduleView keys
+                     it by the integer location_id.
+        location_id: The location PK to look up (an int, e.g. location.pk).
 
     Returns:
         List of Shift objects, or empty list if none.
     """
+    return day_slice.get(location_id, [])
+
+
+# Card colour by shift state: draft, fully staffed, still needs staff
+_SHIFT_CSS_DRAFT = {"border": "border-secondary", "badge": "bg-secondary"}
+_SHIFT_CSS_STAFFED = {"border": "border-success", "badge": "bg-success"}
+_SHIFT_CSS_OPEN = {"border": "border-warning", "badge": "bg-warning text-dark"}
+
+
+@register.simple_tag
+def shift_css(shift) -> dict:
+    """
+    Return the Bootstrap classes for a shift card on the schedule grid.
+
+    Usage:  {% shift_css shift as css %} … {{ css.border }} … {{ css.badge }}
+
+    Args:
+        shift: A Shift; is_fully_staffed reads the denormalized
+               active_assignment_count, so no query is issued.
 
-    return day_slice.get(int(location_id), [])
\ No newline at end of file
+    Returns:
+        Dict with "border" and "badge" class strings.
+    """
+    if not shift.is_published:
+        return _SHIFT_CSS_DRAFT
+    if shift.is_fully_staffed:
+        return _SHIFT_CSS_STAFFED
+    return _SHIFT_CSS_OPEN
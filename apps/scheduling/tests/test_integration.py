@@ -1,106 +1,622 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.db.models import Exists
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
-from apps.accounts.models import User, Skill
-from apps.locations.models import Location
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+from apps.accounts.models import StaffAvailability, User, Skill
+from apps.locations.models import Location, LocationCertification
+from apps.scheduling.constraints import ConstraintResult
 from apps.scheduling.models import ManagerOverride, Shift, ShiftAssignment, SwapRequest
 from apps.notifications.models import Notification
 from apps.audit.models import AuditLog
+from apps.notifications.tasks import record_assignment_audit
+from apps.scheduling.services import ShiftAssignmentService
+from apps.scheduling.tests.test_models import make_users
 
 
+# Reference rows the classes below only read, created once for the module rather
+# than once per class. They live outside the per-class transactions, so they are
+# removed again in tearDownModule; get_or_create keeps an interrupted --keepdb
+# run from tripping over the unique names.
+_reference = {}
+
+
+def setUpModule():
+    _reference["skill"], _ = Skill.objects.get_or_create(name="server", defaults={"display_name": "Server"})
+    _reference["location"], _ = Location.objects.get_or_create(
+        name="Downtown", defaults={"timezone": "America/New_York"}
+    )
+
+
+def tearDownModule():
+    _reference.pop("location").delete()
+    _reference.pop("skill").delete()
+
+
+def audit_log_with_notification(notification_filter, **log_filter):
+    """
+    Fetch the single AuditLog matching log_filter in one query, annotated with
+    has_notification: whether a Notification matching notification_filter exists.
+    """
+    return AuditLog.objects.annotate(
+        has_notification=Exists(Notification.objects.filter(**notification_filter))
+    ).get(**log_filter)
+
+
+# Audit + notification writes run in Celery tasks queued on commit; run them inline
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 class TestShiftAssignmentIntegration(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(email="staff@example.com", password="pass123")
-        self.manager = User.objects.create_user(email="mgr@example.com", password="pass123", role=User.Role.MANAGER)
-        self.skill = Skill.objects.create(name="server", display_name="Server")
-        self.location = Location.objects.create(name="Downtown", timezone="America/New_York")
-        self.shift = Shift.objects.create(
-            location=self.location,
-            required_skill=self.skill,
-            start_utc=timezone.now(),
-            end_utc=timezone.now() + timedelta(hours=4),
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.manager = make_users(
+            {"email": "staff@example.com"}, {"email": "mgr@example.com", "role": User.Role.MANAGER}
+        )
+        cls.skill = _reference["skill"]
+        cls.location = _reference["location"]
+        now = timezone.now()
+        cls.shift = Shift.objects.create(
+            location=cls.location,
+            required_skill=cls.skill,
+            start_utc=now,
+            end_utc=now + timedelta(hours=4),
         )
 
     def test_assignment_triggers_notification_and_audit(self):
-        assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
-
-        # Notification created
-        notif = Notification.objects.filter(recipient=self.user).first()
-        self.assertIsNotNone(notif)
-        self.assertIn("Shift", notif.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
 
-        # Audit log created
-        log = AuditLog.objects.filter(actor=self.manager, action="shift_assignment.created").first()
-        self.assertIsNotNone(log)
+        # Audit log created, and notification created
+        log = audit_log_with_notification(
+            {"recipient": self.user, "title__contains": "Shift"},
+            actor=self.manager, action="shift_assignment.created"
+        )
+        self.assertTrue(log.has_notification)
         self.assertIn("shift_assignment.created", str(log))
 
+    def test_audit_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(AuditLog.objects.filter(action="shift_assignment.created").exists())
+
+    def test_unreachable_broker_is_logged_after_commit(self):
+        with mock.patch("apps.scheduling.signals.record_assignment_audit") as task:
+            task.delay.side_effect = ConnectionRefusedError
+            task.name = "record_assignment_audit"
+            with self.assertLogs("apps.scheduling.signals", "ERROR"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
+        self.assertTrue(ShiftAssignment.objects.filter(user=self.user, shift=self.shift).exists())
+
+    def test_audit_task_fetches_assignment_once(self):
+        with self.captureOnCommitCallbacks():
+            assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
+        # SELECT assignment (with shift/location/skill) + INSERT audit + INSERT notification
+        with self.assertNumQueries(3):
+            record_assignment_audit(assignment.pk)
+
+    def test_claim_rechecks_capacity_after_locking_the_shift(self):
+        ShiftAssignment.objects.create(user=self.manager, shift=self.shift)
+        self.client.force_login(self.user)
 
+        response = self.client.post(reverse("scheduling:claim_shift", args=[self.shift.pk]))
+
+        self.assertContains(response, "just claimed by someone else")
+        self.assertFalse(ShiftAssignment.objects.filter(user=self.user).exists())
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 class TestSwapRequestIntegration(TestCase):
-    def setUp(self):
-        self.user1 = User.objects.create_user(email="u1@example.com", password="pass123", first_name="User", last_name="One")
-        self.user2 = User.objects.create_user(email="u2@example.com", password="pass123", first_name="User", last_name="Two")
-        self.skill = Skill.objects.create(name="cook", display_name="Cook")
-        self.location = Location.objects.create(name="Harbor", timezone="America/New_York")
-        self.shift = Shift.objects.create(
-            location=self.location,
-            required_skill=self.skill,
-            start_utc=timezone.now(),
-            end_utc=timezone.now() + timedelta(hours=4),
-        )
-        self.assignment = ShiftAssignment.objects.create(user=self.user1, shift=self.shift, assigned_by=self.user1)
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1, cls.user2 = make_users(
+            {"email": "u1@example.com", "first_name": "User", "last_name": "One"},
+            {"email": "u2@example.com", "first_name": "User", "last_name": "Two"},
+        )
+        cls.skill = _reference["skill"]
+        cls.location = _reference["location"]
+        now = timezone.now()
+        cls.shift = Shift.objects.create(
+            location=cls.location,
+            required_skill=cls.skill,
+            start_utc=now,
+            end_utc=now + timedelta(hours=4),
+        )
+        cls.assignment = ShiftAssignment.objects.create(user=cls.user1, shift=cls.shift, assigned_by=cls.user1)
 
     def test_swap_request_triggers_notification_and_audit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            swap = SwapRequest.objects.create(
+                requester=self.user1,
+                target=self.user2,
+                assignment=self.assignment,
+                request_type=SwapRequest.Type.SWAP,
+            )
+
+        # Audit log created for requester, and notification created for assignment owner
+        log = audit_log_with_notification(
+            {"recipient": self.user1, "title__contains": "Swap Request Received"},
+            actor=self.user1, action="swap_request.swap.created"
+        )
+        self.assertTrue(log.has_notification)
+        self.assertIn("swap_request.swap.created", str(log))
+
+    def test_review_of_a_settled_request_changes_nothing(self):
+        manager, = make_users({"email": "mgr@example.com", "role": User.Role.MANAGER})
         swap = SwapRequest.objects.create(
-            requester=self.user1,
-            target=self.user2,
-            assignment=self.assignment,
-            request_type=SwapRequest.Type.SWAP,
+            requester=self.user1, target=self.user2, assignment=self.assignment,
+            request_type=SwapRequest.Type.SWAP, status=SwapRequest.Status.APPROVED,
         )
+        ShiftAssignment.objects.filter(pk=self.assignment.pk).update(status=ShiftAssignment.Status.COVERED)
+        self.client.force_login(manager)
 
-        # Notification created for assignment owner
-        notif = Notification.objects.filter(recipient=self.assignment.user).first()
-        self.assertIsNotNone(notif)
-        self.assertIn("Swap Request Received", notif.title)
+        # e.g. a second manager rejecting from a page loaded before the approval
+        self.client.post(reverse("scheduling:swap_review", args=[swap.pk]), {"action": "reject"})
 
-        # Audit log created for requester
-        log = AuditLog.objects.filter(actor=self.user1, action="swap_request.swap.created").first()
-        self.assertIsNotNone(log)
-        self.assertIn("swap_request.swap.created", str(log))
+        swap.refresh_from_db()
+        self.assertEqual(swap.status, SwapRequest.Status.APPROVED)
+        self.assertEqual(
+            ShiftAssignment.objects.get(pk=self.assignment.pk).status, ShiftAssignment.Status.COVERED
+        )
 
 
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 class TestManagerOverrideIntegration(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager, cls.user = make_users(
+            {"email": "mgr@example.com", "role": User.Role.MANAGER}, {"email": "staff@example.com"}
+        )
+        cls.skill = _reference["skill"]
+        cls.location = _reference["location"]
+        now = timezone.now()
+        cls.shift = Shift.objects.create(
+            location=cls.location,
+            required_skill=cls.skill,
+            start_utc=now,
+            end_utc=now + timedelta(hours=4),
+        )
+        cls.assignment = ShiftAssignment.objects.create(
+            user=cls.user, shift=cls.shift, assigned_by=cls.manager
+        )
+
+    def test_manager_override_triggers_audit_and_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            override = ManagerOverride.objects.create(
+                assignment=self.assignment,
+                manager=self.manager,
+                reason="Overtime exception"
+            )
+
+        # Audit log created for manager, and notification created for staff
+        log = audit_log_with_notification(
+            {"recipient": self.user, "title__contains": "Manager Override"},
+            actor=self.manager, action="manager_override.created"
+        )
+        self.assertTrue(log.has_notification)
+        self.assertIn("manager_override.created", str(log))
+
+
+class TestBulkAssign(TestCase):
     def setUp(self):
-        self.manager = User.objects.create_user(
-            email="mgr@example.com", password="pass123", role=User.Role.MANAGER
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass123", role=User.Role.MANAGER)
+        self.skill = Skill.objects.create(name="host", display_name="Host")
+        self.location = Location.objects.create(name="Pier", timezone="UTC")
+        self.staff = []
+        for n in range(2):
+            user = User.objects.create_user(email=f"staff{n}@example.com", password="pass123")
+            user.skills.add(self.skill)
+            LocationCertification.objects.create(user=user, location=self.location, is_active=True)
+            StaffAvailability.objects.create(
+                user=user, recurrence=StaffAvailability.Recurrence.WEEKLY, day_of_week=0,
+                start_time=time(8, 0), end_time=time(20, 0), timezone="UTC",
+            )
+            self.staff.append(user)
+
+        monday = datetime(2030, 1, 7, tzinfo=dt_timezone.utc)
+        self.lunch = Shift.objects.create(
+            location=self.location, required_skill=self.skill, headcount_needed=2,
+            start_utc=monday.replace(hour=10), end_utc=monday.replace(hour=14),
         )
-        self.user = User.objects.create_user(
-            email="staff@example.com", password="pass123"
+        self.overlapping = Shift.objects.create(
+            location=self.location, required_skill=self.skill,
+            start_utc=monday.replace(hour=12), end_utc=monday.replace(hour=16),
         )
-        self.skill = Skill.objects.create(name="expo", display_name="Expo")
-        self.location = Location.objects.create(name="Marina", timezone="America/Los_Angeles")
-        self.shift = Shift.objects.create(
-            location=self.location,
-            required_skill=self.skill,
-            start_utc=timezone.now(),
-            end_utc=timezone.now() + timedelta(hours=4),
+
+    def test_assign_rechecks_the_users_bookings_under_the_lock(self):
+        alice, _ = self.staff
+        ShiftAssignment.objects.create(user=alice, shift=self.lunch)
+        # The unlocked pass ran before a concurrent assign of the lunch shift committed
+        with mock.patch("apps.scheduling.services.ConstraintEngine.check", return_value=ConstraintResult.success()):
+            outcome = ShiftAssignmentService.assign(alice, self.overlapping, assigned_by=self.manager)
+
+        self.assertFalse(outcome["success"])
+        self.assertEqual(outcome["result"].constraint_id, "double_booking")
+        self.assertFalse(ShiftAssignment.objects.filter(user=alice, shift=self.overlapping).exists())
+
+    def test_assign_rechecks_weekly_hours_under_the_lock(self):
+        alice, _ = self.staff
+        monday = self.lunch.start_utc.replace(hour=8)
+        # 36 hours on non-adjacent days, committed while the unlocked pass ran
+        for day in (0, 2, 4, 5):
+            start = monday + timedelta(days=day)
+            shift = Shift.objects.create(
+                location=self.location, required_skill=self.skill, start_utc=start, end_utc=start + timedelta(hours=9),
+            )
+            ShiftAssignment.objects.create(user=alice, shift=shift)
+        sunday = monday + timedelta(days=6)
+        extra = Shift.objects.create(
+            location=self.location, required_skill=self.skill, start_utc=sunday, end_utc=sunday + timedelta(hours=6),
+        )
+        with mock.patch("apps.scheduling.services.ConstraintEngine.check", return_value=ConstraintResult.success()):
+            outcome = ShiftAssignmentService.assign(alice, extra, assigned_by=self.manager)
+
+        self.assertFalse(outcome["success"])
+        self.assertEqual(outcome["result"].constraint_id, "weekly_hours_exceeded")
+        self.assertFalse(ShiftAssignment.objects.filter(user=alice, shift=extra).exists())
+
+    def test_bulk_assign_writes_audit_rows_in_bulk_and_sees_earlier_pairs(self):
+        alice, bob = self.staff
+        with self.captureOnCommitCallbacks() as callbacks:
+            outcome = ShiftAssignmentService.bulk_assign(
+                [(alice, self.lunch), (bob, self.lunch), (alice, self.overlapping), (bob, self.lunch)],
+                assigned_by=self.manager,
+            )
+
+        self.assertEqual(len(outcome["assignments"]), 2)
+        self.assertEqual([c["result"].constraint_id for c in outcome["conflicts"]], ["double_booking"])
+        self.assertEqual(callbacks, [])  # no per-row audit tasks queued
+        self.assertEqual(AuditLog.objects.filter(action="shift_assignment.created").count(), 2)
+        self.assertEqual(Notification.objects.filter(recipient__in=self.staff).count(), 2)
+
+
+class TestBuildWeekGrid(TestCase):
+    def setUp(self):
+        self.skill = _reference["skill"]
+        self.ny = _reference["location"]
+        self.la = Location.objects.create(name="LA", timezone="America/Los_Angeles")
+        self.week_start = datetime(2030, 1, 7).date()  # Monday
+
+    def _shift(self, location, start_utc):
+        return Shift.objects.create(
+            location=location, required_skill=self.skill,
+            start_utc=start_utc, end_utc=start_utc + timedelta(hours=4),
         )
-        self.assignment = ShiftAssignment.objects.create(
-            user=self.user, shift=self.shift, assigned_by=self.manager
+
+    def test_shifts_bucket_by_local_date_and_location(self):
+        from apps.scheduling.views import build_week_grid
+
+        # 02:00 UTC Tuesday is still Monday evening in both New York and LA
+        late_monday_ny = self._shift(self.ny, datetime(2030, 1, 8, 2, tzinfo=dt_timezone.utc))
+        late_monday_la = self._shift(self.la, datetime(2030, 1, 8, 2, tzinfo=dt_timezone.utc))
+        wednesday_ny = self._shift(self.ny, datetime(2030, 1, 9, 15, tzinfo=dt_timezone.utc))
+        # Sunday evening before the week, local time — left out of the grid
+        self._shift(self.la, datetime(2030, 1, 7, 5, tzinfo=dt_timezone.utc))
+
+        grid = build_week_grid(
+            Shift.objects.select_related("location").order_by("start_utc"), self.week_start
         )
 
-    def test_manager_override_triggers_audit_and_notification(self):
-        override = ManagerOverride.objects.create(
-            assignment=self.assignment,
-            manager=self.manager,
-            reason="Overtime exception"
+        monday, wednesday = self.week_start, self.week_start + timedelta(days=2)
+        self.assertEqual(set(grid), {monday, wednesday})
+        self.assertEqual(grid[monday], {self.ny.pk: [late_monday_ny], self.la.pk: [late_monday_la]})
+        self.assertEqual(grid[wednesday], {self.ny.pk: [wednesday_ny]})
+
+
+class TestDashboardContexts(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skill = _reference["skill"]
+        cls.ny = _reference["location"]
+        cls.la = Location.objects.create(name="LA", timezone="America/Los_Angeles")
+        Location.objects.create(name="Closed", timezone="UTC", is_active=False)
+        cls.alice, cls.bob = make_users({"email": "alice@example.com"}, {"email": "bob@example.com"})
+        LocationCertification.objects.bulk_create([
+            LocationCertification(user=cls.alice, location=cls.ny, is_active=True),
+            LocationCertification(user=cls.bob, location=cls.ny, is_active=True),
+            LocationCertification(user=cls.bob, location=cls.la, is_active=False),
+        ])
+
+        soon = timezone.now() + timedelta(hours=1)
+        cls.ny_shift = Shift.objects.create(
+            location=cls.ny, required_skill=cls.skill, headcount_needed=3,
+            start_utc=soon, end_utc=soon + timedelta(hours=4), is_published=True,
         )
+        Shift.objects.create(
+            location=cls.ny, required_skill=cls.skill, headcount_needed=1,
+            start_utc=soon + timedelta(hours=5), end_utc=soon + timedelta(hours=9),
+        )
+        ShiftAssignment.objects.create(user=cls.alice, shift=cls.ny_shift)
+        ShiftAssignment.objects.create(user=cls.bob, shift=cls.ny_shift)
 
-        # Notification created for staff
-        notif = Notification.objects.filter(recipient=self.user).first()
-        self.assertIsNotNone(notif)
-        self.assertIn("Manager Override", notif.title)
+    def setUp(self):
+        cache.clear()  # cached on-duty partials would outlive the rolled-back rows
 
-        # Audit log created for manager
-        log = AuditLog.objects.filter(actor=self.manager, action="manager_override.created").first()
-        self.assertIsNotNone(log)
-        self.assertIn("manager_override.created", str(log))
+    def test_admin_location_summaries_are_aggregated(self):
+        from apps.scheduling.views import DashboardView
+
+        closed = Location.objects.get(name="Closed")
+        Shift.objects.create(
+            location=closed, required_skill=self.skill,
+            start_utc=self.ny_shift.start_utc, end_utc=self.ny_shift.end_utc,
+        )
+
+        # locations, managers, shift stats, staff counts, total staff, overtime
+        with self.assertNumQueries(6):
+            context = DashboardView()._admin_context()
+
+        self.assertEqual(context["total_locations"], 2)
+        self.assertEqual(context["shifts_this_week"], 3)  # inactive locations still count
+        summaries = {row["location"].pk: row for row in context["location_summaries"]}
+        self.assertEqual(set(summaries), {self.ny.pk, self.la.pk})
+        self.assertEqual(
+            (summaries[self.ny.pk]["shift_count"], summaries[self.ny.pk]["staff_count"]), (2, 2)
+        )
+        self.assertEqual(summaries[self.ny.pk]["coverage_pct"], 50)  # 2 of 4 places filled
+        self.assertEqual(
+            (summaries[self.la.pk]["shift_count"], summaries[self.la.pk]["staff_count"]), (0, 0)
+        )
+        self.assertEqual(summaries[self.la.pk]["coverage_pct"], 100)
+
+    def test_overtime_warning_count_is_one_grouped_query(self):
+        from apps.scheduling.views import DashboardView
+
+        # Alice: 4h + 32h = 36h this week, past the 35h warning; Bob: 4h
+        start = self.ny_shift.end_utc
+        long_shift = Shift.objects.create(
+            location=self.ny, required_skill=self.skill, start_utc=start, end_utc=start + timedelta(hours=32),
+        )
+        ShiftAssignment.objects.create(user=self.alice, shift=long_shift)
+        now = timezone.now()
+        week_start = now - timedelta(days=now.weekday())
+
+        with self.assertNumQueries(1):
+            count = DashboardView._overtime_warning_count(week_start, week_start + timedelta(days=7))
+        self.assertEqual(count, 1)
+
+    def test_manager_staff_hours_come_from_one_grouped_query(self):
+        from apps.scheduling.views import DashboardView
+
+        manager, = make_users({"email": "mgr@example.com", "role": User.Role.MANAGER})
+        self.ny.managers.add(manager)
+
+        # managed locations, understaffed shifts, staff ids, hours per user, staff users (+ skills),
+        # week shift count; the other queries filter on the location ids, not a subquery
+        with CaptureQueriesContext(connection) as queries:
+            context = DashboardView()._manager_context(manager)
+        self.assertEqual(len(queries), 7)
+        self.assertEqual(sum(q["sql"].count("SELECT") for q in queries), 7)
+        hours = {row["user"].pk: row["hours"] for row in context["staff_hours"]}
+        self.assertEqual(hours, {self.alice.pk: 4.0, self.bob.pk: 4.0})
+        with self.assertNumQueries(0):  # what the hours table renders per row
+            for row in context["staff_hours"]:
+                row["user"].get_full_name(), list(row["user"].skills.all())
+        self.assertEqual(context["total_staff"], 2)
+
+    def test_staff_week_hours_is_a_single_aggregate(self):
+        week = ShiftAssignment.objects.filter(user=self.alice)
+        with self.assertNumQueries(1):
+            self.assertEqual(week.total_duration(), timedelta(hours=4))
+        self.assertEqual(ShiftAssignment.objects.none().total_duration(), timedelta())
+
+    def test_understaffed_matches_is_fully_staffed(self):
+        # ny_shift: published, 2 of 3 places filled; the other NY shift is a draft
+        self.assertEqual(list(Shift.objects.understaffed()), [self.ny_shift])
+        ShiftAssignment.objects.create(user=make_users({"email": "cy@example.com"})[0], shift=self.ny_shift)
+        self.assertFalse(Shift.objects.understaffed().exists())
+
+    def test_staff_context_counts_from_fetched_rows(self):
+        from apps.scheduling.views import DashboardView
+
+        SwapRequest.objects.create(
+            requester=self.alice, target=self.bob, request_type=SwapRequest.Type.SWAP,
+            assignment=ShiftAssignment.objects.get(user=self.alice, shift=self.ny_shift),
+        )
+        # upcoming, week hours, swaps (+ their locations and skills), claimable shifts
+        with self.assertNumQueries(6):
+            context = DashboardView()._staff_context(self.alice)
+        self.assertEqual(context["upcoming_count"], 1)
+        self.assertEqual(context["next_shift"].shift, self.ny_shift)
+        self.assertEqual(context["pending_swaps_count"], 1)
+
+    def test_claimable_shifts_load_only_rendered_fields(self):
+        from apps.scheduling.views import DashboardView
+
+        self.alice.skills.add(self.skill)
+        start = self.ny_shift.end_utc
+        open_shift = Shift.objects.create(
+            location=self.ny, required_skill=self.skill, start_utc=start,
+            end_utc=start + timedelta(hours=4), is_published=True,
+        )
+
+        claimable = DashboardView()._staff_context(self.alice)["claimable_shifts"]
+        self.assertEqual(claimable, [open_shift])
+        with self.assertNumQueries(0):
+            shift = claimable[0]
+            shift.pk, shift.duration_hours, shift.location.name, shift.required_skill.display_name
+
+    def test_shift_manage_filters_in_sql(self):
+        manager, = make_users({"email": "mgr@example.com", "role": User.Role.MANAGER})
+        self.ny.managers.add(manager)
+        self.client.force_login(manager)
+
+        response = self.client.get(
+            "/shifts/manage/", {"status": "understaffed", "from_date": f"{self.ny_shift.start_utc:%Y-%m-%d}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["shifts"]), [self.ny_shift])
+
+    def test_toggle_publish_checks_location_access_with_the_shift_fetch(self):
+        from apps.scheduling.views import TogglePublishView
+
+        manager, la_manager = make_users(
+            {"email": "mgr@example.com", "role": User.Role.MANAGER},
+            {"email": "la-mgr@example.com", "role": User.Role.MANAGER},
+        )
+        self.ny.managers.add(manager)
+        self.la.managers.add(la_manager)
+        draft = Shift.objects.get(location=self.ny, is_published=False)
+        view = TogglePublishView()
+        view.request = RequestFactory().post("/")
+        view.request.user = manager
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view.get_managed_object_or_403(Shift.objects, draft.pk), draft)
+        # The manager's locations are loaded once per view and then shared
+        with self.assertNumQueries(1):
+            self.assertEqual(view.get_location_or_403(self.ny.pk), self.ny)
+            self.assertEqual(list(view.get_manager_locations()), [self.ny])
+            with self.assertRaises(PermissionDenied):
+                view.get_location_or_403(self.la.pk)
+
+        self.client.force_login(la_manager)
+        response = self.client.post(reverse("scheduling:toggle_publish", args=[draft.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(manager)
+        self.client.post(reverse("scheduling:toggle_publish", args=[draft.pk]), {"was_published": "0"})
+        self.assertTrue(Shift.objects.get(pk=draft.pk).is_published)
+
+        # A second click from a page that still shows the draft must not unpublish it
+        self.client.post(reverse("scheduling:toggle_publish", args=[draft.pk]), {"was_published": "0"})
+        self.assertTrue(Shift.objects.get(pk=draft.pk).is_published)
+
+    def test_htmx_toggle_and_delete_swap_the_row_in_place(self):
+        manager, = make_users({"email": "mgr@example.com", "role": User.Role.MANAGER})
+        self.ny.managers.add(manager)
+        draft = Shift.objects.get(location=self.ny, is_published=False)
+        later = timezone.now() + timedelta(days=10)
+        spare = Shift.objects.create(location=self.ny, required_skill=self.skill, start_utc=later, end_utc=later + timedelta(hours=4))
+        self.client.force_login(manager)
+
+        response = self.client.post(
+            reverse("scheduling:toggle_publish", args=[draft.pk]), {"was_published": "0"}, HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "scheduling/partials/shift_manage_row.html")
+        self.assertContains(response, 'name="was_published" value="1"')
+
+        # A stale click can't swap in a row, so the page reloads to show the warning
+        response = self.client.post(
+            reverse("scheduling:toggle_publish", args=[draft.pk]), {"was_published": "0"}, HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(response["HX-Refresh"], "true")
+
+        response = self.client.post(reverse("scheduling:delete_shift", args=[spare.pk]), HTTP_HX_REQUEST="true")
+        self.assertEqual((response.status_code, response.content), (200, b""))
+        self.assertFalse(Shift.objects.filter(pk=spare.pk).exists())
+
+    def test_publish_week_covers_from_date_up_to_the_following_week(self):
+        manager, = make_users({"email": "mgr@example.com", "role": User.Role.MANAGER})
+        self.ny.managers.add(manager)
+        monday = datetime(2030, 1, 7, tzinfo=dt_timezone.utc)
+        inside, next_week = Shift.objects.bulk_create([
+            Shift(location=self.ny, required_skill=self.skill, start_utc=start, end_utc=start + timedelta(hours=4))
+            for start in (monday + timedelta(days=6, hours=23), monday + timedelta(days=7))
+        ])
+        self.client.force_login(manager)
+
+        # Another manager's location, or a malformed one, publishes nothing at all
+        response = self.client.post(reverse("scheduling:publish_week"), {"from_date": "2030-01-07", "location": self.la.pk})
+        self.assertEqual(response.status_code, 403)
+        self.client.post(reverse("scheduling:publish_week"), {"from_date": "2030-01-07", "location": "1 OR 1=1"})
+        self.assertFalse(Shift.objects.filter(pk=inside.pk, is_published=True).exists())
+
+        self.client.post(reverse("scheduling:publish_week"), {"from_date": "2030-01-07", "location": self.ny.pk})
+
+        published = set(Shift.objects.filter(is_published=True).values_list("pk", flat=True))
+        self.assertIn(inside.pk, published)
+        self.assertNotIn(next_week.pk, published)
+        inside.refresh_from_db()
+        self.assertEqual(inside.published_by, manager)
+        self.assertIsNotNone(inside.published_at)
+
+    def test_assign_candidates_lists_qualified_staff_with_week_hours(self):
+        manager, other_manager = make_users(
+            {"email": "mgr@example.com", "role": User.Role.MANAGER},
+            {"email": "la-mgr@example.com", "role": User.Role.MANAGER},
+        )
+        self.ny.managers.add(manager)
+        self.la.managers.add(other_manager)
+        self.alice.skills.add(self.skill)
+        self.bob.skills.add(self.skill)
+        LocationCertification.objects.filter(user=self.bob, location=self.ny).update(is_active=False)
+        url = reverse("scheduling:assign_candidates", args=[self.ny_shift.pk])
+
+        self.client.force_login(manager)
+        candidates = self.client.get(url).json()["candidates"]
+        self.assertEqual(candidates, [{"id": self.alice.pk, "name": "", "hours": 4.0}])
+
+        self.client.force_login(other_manager)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_on_duty_now_buckets_one_query_by_location(self):
+        from apps.scheduling.views import on_duty_now
+
+        started = timezone.now() - timedelta(hours=1)
+        current = Shift.objects.create(
+            location=self.ny, required_skill=self.skill, start_utc=started, end_utc=started + timedelta(hours=4),
+        )
+        ShiftAssignment.objects.create(user=self.bob, shift=current)
+        admin, = make_users({"email": "admin@example.com", "role": User.Role.ADMIN})
+        request = RequestFactory().get("/on-duty/")
+        request.user = admin
+
+        with self.assertNumQueries(2):  # assignments, locations
+            response = on_duty_now(request)
+
+        self.assertContains(response, "Nobody on shift right now.", count=1)  # LA
+        self.assertContains(response, self.bob.get_full_name())
+
+        # The next poll is served from the cache until an assignment changes
+        with self.assertNumQueries(0):
+            self.assertEqual(on_duty_now(request).content, response.content)
+        ShiftAssignment.objects.create(user=self.alice, shift=current)
+        self.assertContains(on_duty_now(request), self.alice.get_full_name())
+
+    def test_admin_activity_cards_are_cached_until_the_audit_log_changes(self):
+        admin, = make_users({"email": "admin@example.com", "role": User.Role.ADMIN})
+        self.client.force_login(admin)
+        AuditLog.objects.create(actor=admin, action="shift.created")
+        dashboard = reverse("scheduling:dashboard")
+
+        self.assertContains(self.client.get(dashboard), "shift.created")
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(dashboard)
+        self.assertFalse([q for q in cached if "audit_auditlog" in q["sql"]])
+
+        AuditLog.objects.create(actor=admin, action="shift.published")
+        self.assertContains(self.client.get(dashboard), "shift.published")
+
+    def test_my_shifts_prefetches_locations_and_skills_once(self):
+        self.client.force_login(self.alice)
+        response = self.client.get("/my-shifts/")
+
+        self.assertEqual(response.status_code, 200)
+        upcoming = list(response.context["upcoming"])
+        self.assertEqual([a.shift for a in upcoming], [self.ny_shift])
+        with self.assertNumQueries(0):
+            self.assertEqual(upcoming[0].shift.location.name, self.ny.name)
+
+    def test_my_shifts_loads_further_upcoming_pages_over_htmx(self):
+        start = self.ny_shift.end_utc
+        later = Shift.objects.create(
+            location=self.la, required_skill=self.skill, start_utc=start, end_utc=start + timedelta(hours=4),
+        )
+        ShiftAssignment.objects.create(user=self.alice, shift=later)
+        self.client.force_login(self.alice)
+
+        with mock.patch("apps.scheduling.views.MY_SHIFTS_PAGE_SIZE", 1):
+            first = self.client.get("/my-shifts/")
+            more = self.client.get("/my-shifts/?page=2", HTTP_HX_REQUEST="true")
+
+        self.assertEqual([a.shift for a in first.context["upcoming"]], [self.ny_shift])
+        self.assertContains(first, "?page=2")
+        self.assertEqual([a.shift for a in more.context["upcoming"]], [later])
+        self.assertNotContains(more, "<h1")
+        self.assertNotContains(more, "Load more")
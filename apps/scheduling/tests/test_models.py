@@ -1,16 +1,33 @@
-from django.test import TestCase
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
 from datetime import timedelta, datetime
 from zoneinfo import ZoneInfo
 from apps.accounts.models import User, Skill
 from apps.locations.models import Location
 from apps.scheduling.models import Shift, ShiftAssignment, SwapRequest, ManagerOverride
+from apps.scheduling.templatetags.scheduling_tags import shift_css
 
 
-class TestShiftModel(TestCase):
+def make_users(*fields):
+    """
+    Insert one User per dict of field values with a single bulk_create.
+
+    bulk_create bypasses create_user(), so the shared "pass123" password is
+    hashed once here rather than once per user.
+    """
+    password = make_password("pass123")
+    return User.objects.bulk_create([User(password=password, **f) for f in fields])
+
+
+class TestShiftProperties(SimpleTestCase):
+    """Properties computed from an unsaved Shift; no database needed."""
+
     def setUp(self):
-        self.skill = Skill.objects.create(name="bartender", display_name="Bartender")
-        self.location = Location.objects.create(name="Westside", timezone="America/Los_Angeles")
+        self.skill = Skill(name="bartender", display_name="Bartender")
+        self.location = Location(name="Westside", timezone="America/Los_Angeles")
 
     def test_is_premium_shift(self):
         # Explicitly set a Friday 7pm PT shift 
@@ -21,30 +38,143 @@ class TestShiftModel(TestCase):
         start_utc = start_local.astimezone(ZoneInfo("UTC"))
         end_utc = end_local.astimezone(ZoneInfo("UTC"))
 
-        shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=start_utc, end_utc=end_utc)
+        shift = Shift(location=self.location, required_skill=self.skill, start_utc=start_utc, end_utc=end_utc)
         
         self.assertTrue(shift.is_premium, "Friday evening shift should be premium")
 
-class TestShiftAssignment(TestCase):
+    def test_is_overnight_in_location_timezone(self):
+        # 10pm–2am PT crosses local midnight even though both ends share a UTC date
+        start_local = datetime(2026, 2, 27, 22, 0, tzinfo=ZoneInfo("America/Los_Angeles"))
+        shift = Shift(location=self.location, required_skill=self.skill, start_utc=start_local.astimezone(ZoneInfo("UTC")), end_utc=(start_local + timedelta(hours=4)).astimezone(ZoneInfo("UTC")))
+
+        self.assertEqual(shift.start_local.hour, 22)
+        self.assertTrue(shift.is_overnight)
+
+    def test_shift_css_follows_publish_and_staffing_state(self):
+        shift = Shift(location=self.location, required_skill=self.skill, headcount_needed=2, active_assignment_count=1)
+        self.assertEqual(shift_css(shift)["border"], "border-secondary")
+        shift.is_published = True
+        self.assertEqual(shift_css(shift)["border"], "border-warning")
+        shift.active_assignment_count = 2
+        self.assertEqual(shift_css(shift)["badge"], "bg-success")
+
+
+class TestShiftModel(TestCase):
     def setUp(self):
-        self.user = User.objects.create_user(email="staff@example.com", password="pass123", first_name="Staff", last_name="Member")
-        self.skill = Skill.objects.create(name="server", display_name="Server")
-        self.location = Location.objects.create(name="Downtown", timezone="America/New_York")
-        self.shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=timezone.now(), end_utc=timezone.now() + timedelta(hours=4))
+        self.skill = Skill.objects.create(name="bartender", display_name="Bartender")
+        self.location = Location.objects.create(name="Westside", timezone="America/Los_Angeles")
+
+    def test_premium_cached_follows_start_time(self):
+        start_local = datetime(2026, 2, 27, 19, 0, tzinfo=ZoneInfo("America/Los_Angeles"))  # Friday
+        shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=start_local.astimezone(ZoneInfo("UTC")), end_utc=(start_local + timedelta(hours=5)).astimezone(ZoneInfo("UTC")))
+        self.assertTrue(Shift.objects.filter(pk=shift.pk, premium_cached=True).exists())
+
+        # Moving it to Friday morning drops the premium flag on the next save
+        shift.start_utc -= timedelta(hours=10)
+        shift.end_utc -= timedelta(hours=10)
+        shift.save()
+        self.assertFalse(Shift.objects.filter(pk=shift.pk, premium_cached=True).exists())
+
+class TestShiftAssignment(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="staff@example.com", password="pass123", first_name="Staff", last_name="Member")
+        cls.skill = Skill.objects.create(name="server", display_name="Server")
+        cls.location = Location.objects.create(name="Downtown", timezone="America/New_York")
+        now = timezone.now()
+        cls.shift = Shift.objects.create(location=cls.location, required_skill=cls.skill, start_utc=now, end_utc=now + timedelta(hours=4))
 
     def test_assignment_creation(self):
         assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
         self.assertEqual(assignment.status, ShiftAssignment.Status.ASSIGNED)
 
+    def test_is_fully_staffed_without_annotation(self):
+        self.assertFalse(self.shift.is_fully_staffed)
+        ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
+        self.assertTrue(self.shift.is_fully_staffed)
+
+    def test_editable_matches_is_past_edit_cutoff(self):
+        now = timezone.now()
+        soon = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=now + timedelta(hours=10), end_utc=now + timedelta(hours=14))
+        later = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=now + timedelta(hours=10), end_utc=now + timedelta(hours=14), edit_cutoff_hours=6)
+
+        editable = set(Shift.objects.editable().values_list("pk", flat=True))
+        self.assertEqual(editable, {later.pk})
+        self.assertTrue(soon.is_past_edit_cutoff)
+        self.assertFalse(later.is_past_edit_cutoff)
+
+    def test_with_assignment_counts_avoids_per_shift_queries(self):
+        ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
+        other = User.objects.create_user(email="other@example.com", password="pass123")
+        ShiftAssignment.objects.create(user=other, shift=self.shift, status=ShiftAssignment.Status.DROPPED)
+        with self.assertNumQueries(1):
+            shift = Shift.objects.with_assignment_counts().get(pk=self.shift.pk)
+            self.assertEqual(shift.assigned_count, 1)
+            self.assertTrue(shift.is_fully_staffed)
+
+    def test_active_assignment_count_follows_status_changes(self):
+        assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
+        other = User.objects.create_user(email="other@example.com", password="pass123")
+        dropped = ShiftAssignment.objects.create(user=other, shift=self.shift, status=ShiftAssignment.Status.DROPPED)
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+
+        # Active → active leaves the count alone; active → inactive releases the place
+        reloaded = ShiftAssignment.objects.get(pk=assignment.pk)
+        reloaded.status = ShiftAssignment.Status.SWAP_PENDING
+        reloaded.save(update_fields=["status"])
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+        reloaded.status = ShiftAssignment.Status.COVERED
+        reloaded.save(update_fields=["status"])
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 0)
+
+        dropped.status = ShiftAssignment.Status.ASSIGNED
+        dropped.save()
+        dropped.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(Shift.objects.get(pk=self.shift.pk).assigned_count, 0)
+
+    def test_active_assignment_count_survives_refresh_deferral_and_shift_saves(self):
+        assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
+        stale_shift = Shift.objects.get(pk=self.shift.pk)
+
+        # Covered elsewhere, then reloaded here and reinstated
+        other = ShiftAssignment.objects.get(pk=assignment.pk)
+        other.status = ShiftAssignment.Status.COVERED
+        other.save()
+        assignment.refresh_from_db()
+        assignment.status = ShiftAssignment.Status.ASSIGNED
+        assignment.save()
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+
+        # Re-saving the same status through an instance loaded without it
+        deferred = ShiftAssignment.objects.defer("status").get(pk=assignment.pk)
+        deferred.status = ShiftAssignment.Status.ASSIGNED
+        deferred.save()
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+
+        # A full save of a shift loaded before the assignment keeps the counter
+        stale_shift.notes = "Bring a jacket"
+        stale_shift.save()
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+
+    def test_rebuild_assignment_counts_repairs_drift(self):
+        ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.user)
+        Shift.objects.filter(pk=self.shift.pk).update(active_assignment_count=5)
+
+        call_command("rebuild_assignment_counts", stdout=StringIO())
+
+        self.assertEqual(Shift.objects.get(pk=self.shift.pk).active_assignment_count, 1)
+
 
 class TestSwapRequest(TestCase):
-    def setUp(self):
-        self.user1 = User.objects.create_user(email="u1@example.com", password="pass123")
-        self.user2 = User.objects.create_user(email="u2@example.com", password="pass123")
-        self.skill = Skill.objects.create(name="cook", display_name="Cook")
-        self.location = Location.objects.create(name="Harbor", timezone="America/New_York")
-        self.shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=timezone.now(), end_utc=timezone.now() + timedelta(hours=4))
-        self.assignment = ShiftAssignment.objects.create(user=self.user1, shift=self.shift, assigned_by=self.user1)
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1, cls.user2 = make_users({"email": "u1@example.com"}, {"email": "u2@example.com"})
+        cls.skill = Skill.objects.create(name="cook", display_name="Cook")
+        cls.location = Location.objects.create(name="Harbor", timezone="America/New_York")
+        now = timezone.now()
+        cls.shift = Shift.objects.create(location=cls.location, required_skill=cls.skill, start_utc=now, end_utc=now + timedelta(hours=4))
+        cls.assignment = ShiftAssignment.objects.create(user=cls.user1, shift=cls.shift, assigned_by=cls.user1)
 
     def test_swap_request_lifecycle(self):
         swap = SwapRequest.objects.create(requester=self.user1, target=self.user2, assignment=self.assignment, request_type=SwapRequest.Type.SWAP)
@@ -53,15 +183,26 @@ class TestSwapRequest(TestCase):
         swap.save()
         self.assertEqual(swap.status, SwapRequest.Status.CANCELLED)
 
+    def test_pending_and_terminal_statuses_partition_choices(self):
+        pending, terminal = SwapRequest.PENDING_STATUSES, SwapRequest.TERMINAL_STATUSES
+        self.assertFalse(pending & terminal)
+        self.assertEqual(pending | terminal, set(SwapRequest.Status.values))
+        swap = SwapRequest(status=SwapRequest.Status.EXPIRED)
+        self.assertTrue(swap.is_terminal)
+        self.assertFalse(swap.is_pending)
+
 
 class TestManagerOverride(TestCase):
-    def setUp(self):
-        self.manager = User.objects.create_user(email="mgr@example.com", password="pass123", role=User.Role.MANAGER)
-        self.user = User.objects.create_user(email="staff@example.com", password="pass123")
-        self.skill = Skill.objects.create(name="expo", display_name="Expo")
-        self.location = Location.objects.create(name="Marina", timezone="America/Los_Angeles")
-        self.shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=timezone.now(), end_utc=timezone.now() + timedelta(hours=4))
-        self.assignment = ShiftAssignment.objects.create(user=self.user, shift=self.shift, assigned_by=self.manager)
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager, cls.user = make_users(
+            {"email": "mgr@example.com", "role": User.Role.MANAGER}, {"email": "staff@example.com"}
+        )
+        cls.skill = Skill.objects.create(name="expo", display_name="Expo")
+        cls.location = Location.objects.create(name="Marina", timezone="America/Los_Angeles")
+        now = timezone.now()
+        cls.shift = Shift.objects.create(location=cls.location, required_skill=cls.skill, start_utc=now, end_utc=now + timedelta(hours=4))
+        cls.assignment = ShiftAssignment.objects.create(user=cls.user, shift=cls.shift, assigned_by=cls.manager)
 
     def test_override_creation(self):
         override = ManagerOverride.objects.create(assignment=self.assignment, manager=self.manager, reason="Overtime exception")
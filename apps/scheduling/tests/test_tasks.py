@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from unittest import mock, skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.models import Skill, User
+from apps.audit.models import AuditLog
+from apps.locations.models import Location
+from apps.scheduling.models import Shift, ShiftAssignment, SwapRequest
+from apps.scheduling.tasks import (
+    _EXPIRY_FIELDS,
+    _expire_and_restore_sql,
+    _expire_batch,
+    expire_drop_requests,
+    expire_swap_requests,
+)
+
+
+class TestExpiryTasks(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(email="u1@example.com", password="pass123")
+        self.user2 = User.objects.create_user(email="u2@example.com", password="pass123")
+        self.skill = Skill.objects.create(name="cook", display_name="Cook")
+        self.location = Location.objects.create(name="Harbor", timezone="America/New_York")
+        start = timezone.now() + timedelta(days=2)
+        self.shift = Shift.objects.create(location=self.location, required_skill=self.skill, start_utc=start, end_utc=start + timedelta(hours=4))
+        self.assignment = ShiftAssignment.objects.create(user=self.user1, shift=self.shift, status=ShiftAssignment.Status.SWAP_PENDING)
+        ContentType.objects.get_for_model(SwapRequest)  # warm the cache so query counts are stable
+
+    def test_expire_drop_requests_restores_assignment(self):
+        drop = SwapRequest.objects.create(requester=self.user1, assignment=self.assignment, request_type=SwapRequest.Type.DROP, status=SwapRequest.Status.PENDING_PICKUP, expires_at=timezone.now() - timedelta(minutes=1))
+        fresh = SwapRequest.objects.create(requester=self.user1, assignment=self.assignment, request_type=SwapRequest.Type.DROP, status=SwapRequest.Status.PENDING_PICKUP, expires_at=timezone.now() + timedelta(hours=1))
+
+        # savepoint, select, expire, expired ids, restore, audit insert, release (one fewer on PostgreSQL)
+        with self.assertNumQueries(6 if connection.vendor == "postgresql" else 7):
+            result = expire_drop_requests()
+
+        self.assertEqual(result, {"expired_drops": 1})
+        drop.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assignment.refresh_from_db()
+        self.assertEqual(drop.status, SwapRequest.Status.EXPIRED)
+        self.assertEqual(fresh.status, SwapRequest.Status.PENDING_PICKUP)
+        self.assertEqual(self.assignment.status, ShiftAssignment.Status.ASSIGNED)
+        log = AuditLog.objects.get(action="swap_request.expired")
+        self.assertEqual(log.object_id, drop.pk)
+        self.assertEqual(log.before, {"status": SwapRequest.Status.PENDING_PICKUP})
+        self.assertIn("Harbor", log.note)
+
+    def test_expire_swap_requests_after_24_hours(self):
+        swap = SwapRequest.objects.create(requester=self.user1, target=self.user2, assignment=self.assignment, request_type=SwapRequest.Type.SWAP)
+        SwapRequest.objects.filter(pk=swap.pk).update(created_at=timezone.now() - timedelta(hours=25))
+
+        self.assertEqual(expire_swap_requests(), {"expired_swaps": 1})
+        swap.refresh_from_db()
+        self.assignment.refresh_from_db()
+        self.assertEqual(swap.status, SwapRequest.Status.EXPIRED)
+        self.assertEqual(self.assignment.status, ShiftAssignment.Status.ASSIGNED)
+        self.assertEqual(expire_swap_requests(), {"expired_swaps": 0})
+
+    def test_expiry_processes_backlog_in_chunks(self):
+        for _ in range(3):
+            SwapRequest.objects.create(requester=self.user1, assignment=self.assignment, request_type=SwapRequest.Type.DROP, status=SwapRequest.Status.PENDING_PICKUP, expires_at=timezone.now() - timedelta(minutes=1))
+
+        with mock.patch("apps.scheduling.tasks.EXPIRY_CHUNK_SIZE", 2):
+            self.assertEqual(expire_drop_requests(), {"expired_drops": 3})
+
+        self.assertEqual(SwapRequest.objects.filter(status=SwapRequest.Status.EXPIRED).count(), 3)
+        self.assertEqual(AuditLog.objects.filter(action="swap_request.expired").count(), 3)
+
+    def _pending_drop_rows(self):
+        """Create two expired drops and read them as the sweep does."""
+        for _ in range(2):
+            SwapRequest.objects.create(requester=self.user1, assignment=self.assignment, request_type=SwapRequest.Type.DROP, status=SwapRequest.Status.PENDING_PICKUP, expires_at=timezone.now() - timedelta(minutes=1))
+        return list(SwapRequest.objects.order_by("pk").values_list(*_EXPIRY_FIELDS, named=True))
+
+    def test_expiry_skips_requests_settled_since_they_were_read(self):
+        stale, pending = self._pending_drop_rows()
+        # Picked up between the sweep's SELECT and its UPDATE
+        SwapRequest.objects.filter(pk=stale.id).update(status=SwapRequest.Status.PENDING_MANAGER)
+
+        self.assertEqual(_expire_batch([stale], timezone.now()), 0)
+
+        self.assertEqual(SwapRequest.objects.get(pk=stale.id).status, SwapRequest.Status.PENDING_MANAGER)
+        self.assertEqual(ShiftAssignment.objects.get(pk=self.assignment.pk).status, ShiftAssignment.Status.SWAP_PENDING)
+        self.assertFalse(AuditLog.objects.filter(action="swap_request.expired").exists())
+        self.assertEqual(_expire_batch([pending], timezone.now()), 1)
+
+    @skipUnless(connection.vendor == "postgresql", "the expiry CTE only runs on PostgreSQL (TEST_POSTGRES=1)")
+    def test_expire_and_restore_sql_rechecks_status(self):
+        stale, pending = self._pending_drop_rows()
+        SwapRequest.objects.filter(pk=stale.id).update(status=SwapRequest.Status.CANCELLED)
+
+        expired = _expire_and_restore_sql([stale.id, pending.id], [SwapRequest.Status.PENDING_PICKUP], timezone.now())
+
+        self.assertEqual(expired, {pending.id})
+        self.assertEqual(SwapRequest.objects.get(pk=stale.id).status, SwapRequest.Status.CANCELLED)
+        self.assertEqual(SwapRequest.objects.get(pk=pending.id).status, SwapRequest.Status.EXPIRED)
+        self.assertEqual(ShiftAssignment.objects.get(pk=self.assignment.pk).status, ShiftAssignment.Status.ASSIGNED)
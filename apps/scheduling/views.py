@@ -12,6 +12,7 @@ View inventory:
   claim_shift           → HTMX POST: staff claims open shift
   LocationListView      → redirect stub
   ShiftManageView       → manager shift table with filters (GET)
+  AssignCandidatesView  → JSON: qualified staff + week hours for the assign modal (GET)
   CreateShiftView       → manager creates a shift (POST)
   AssignStaffView       → manager assigns staff; full constraint engine (POST) [Gap 1]
   TogglePublishView     → manager publishes/unpublishes single shift (POST) [Gap 2: cutoff]
@@ -19,24 +20,36 @@ View inventory:
   DeleteShiftView       → manager deletes draft shift (POST) [Gap 2: cutoff]
 """
 
-import json
 import logging
 from collections import defaultdict
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
 from django.conf import settings
 from django.contrib import messages as msg
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, When
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 
-from apps.accounts.models import User
+from apps.accounts.models import Skill, User
 from apps.audit.models import AuditLog
 from apps.locations.models import Location, LocationCertification
-from apps.scheduling.constraints import ConstraintEngine
+from apps.scheduling import constraints_numba as kernels
+from apps.scheduling.cache import (
+    ADMIN_FRAGMENT_CACHE_TIMEOUT,
+    ON_DUTY_CACHE_TIMEOUT,
+    admin_fragment_generation,
+    on_duty_generation,
+)
+from apps.scheduling.constraints import ConstraintEngine, Severity
 from apps.scheduling.models import ManagerOverride, Shift, ShiftAssignment, SwapRequest
 from core.permissions import AdminRequiredMixin, ManagerRequiredMixin, StaffRequiredMixin
 
@@ -95,6 +108,9 @@ def _notify_user(user_id: int, notification_type: str, title: str, body: str,
 # Dashboard — role-aware router
 # ---------------------------------------------------------------------------
 
+DASHBOARD_SWAP_LIMIT = 10  # newest swap requests on the staff dashboard
+
+
 @method_decorator(login_required(login_url="/accounts/login/"), name="dispatch")
 class DashboardView(View):
     """Central dashboard — renders a different template per user role."""
@@ -111,56 +127,80 @@ class DashboardView(View):
         now = timezone.now()
         week_start = now - timedelta(days=now.weekday())
         week_end = week_start + timedelta(days=7)
-        locations = Location.objects.filter(is_active=True).prefetch_related("managers")
+        locations = list(Location.objects.filter(is_active=True).prefetch_related("managers"))
+        # One GROUP BY per table for every location, instead of three queries per location.
+        # The shift rows are grouped over all locations so they also give the week total.
+        shift_stats = {
+            row["location_id"]: row
+            for row in Shift.objects.filter(
+                start_utc__gte=week_start, start_utc__lt=week_end,
+            ).values("location_id").annotate(
+                shift_count=Count("pk"),
+                total_headcount=Sum("headcount_needed"),
+                filled=Sum("active_assignment_count"),
+            )
+        }
+        staff_counts = dict(
+            LocationCertification.objects.filter(location__in=locations, is_active=True)
+            .values_list("location_id").annotate(Count("pk"))
+        )
         location_summaries = []
         for loc in locations:
-            shifts = Shift.objects.filter(location=loc, start_utc__gte=week_start, start_utc__lt=week_end)
-            total_headcount = sum(s.headcount_needed for s in shifts)
-            filled = sum(s.assigned_count for s in shifts)
-            coverage_pct = int((filled / total_headcount) * 100) if total_headcount else 100
+            stats = shift_stats.get(loc.pk, {"shift_count": 0, "total_headcount": 0, "filled": 0})
+            total_headcount = stats["total_headcount"]
+            coverage_pct = int((stats["filled"] / total_headcount) * 100) if total_headcount else 100
             location_summaries.append({
                 "location": loc,
-                "shift_count": shifts.count(),
-                "staff_count": LocationCertification.objects.filter(location=loc, is_active=True).count(),
+                "shift_count": stats["shift_count"],
+                "staff_count": staff_counts.get(loc.pk, 0),
                 "coverage_pct": coverage_pct,
             })
         return {
             "today": now.date(),
-            "total_locations": locations.count(),
+            "total_locations": len(locations),
             "total_staff": User.objects.filter(role=User.Role.STAFF, is_active=True).count(),
-            "shifts_this_week": Shift.objects.filter(start_utc__gte=week_start, start_utc__lt=week_end).count(),
+            "shifts_this_week": sum(row["shift_count"] for row in shift_stats.values()),
             "overtime_warnings": self._overtime_warning_count(week_start, week_end),
             "location_summaries": location_summaries,
+            # Both lists are lazy: they are only queried when their cached
+            # template fragments have expired or been invalidated
             "pending_swaps": SwapRequest.objects.filter(
                 status=SwapRequest.Status.PENDING_MANAGER
             ).select_related("requester", "assignment__shift__location", "assignment__shift__required_skill"),
-            "recent_audit": AuditLog.objects.select_related("actor").order_by("-created_at"),
+            "recent_audit": AuditLog.objects.select_related("actor").order_by("-created_at")[:10],
+            "fragment_cache_timeout": ADMIN_FRAGMENT_CACHE_TIMEOUT,
+            "fragment_generation": admin_fragment_generation(),
         }
 
     def _manager_context(self, user: User) -> dict:
         now = timezone.now()
         week_start = now - timedelta(days=now.weekday())
         week_end = week_start + timedelta(days=7)
-        managed_locations = user.managed_locations.filter(is_active=True)
+        # Loaded once for the location list; the queries below filter on the ids
+        managed_locations = list(user.managed_locations.filter(is_active=True))
+        managed_ids = [loc.pk for loc in managed_locations]
         week_shifts = Shift.objects.filter(
-            location__in=managed_locations, start_utc__gte=week_start, start_utc__lt=week_end,
-        ).select_related("location", "required_skill")
-        understaffed = [s for s in week_shifts if s.is_published and not s.is_fully_staffed]
-        staff_ids = LocationCertification.objects.filter(
-            location__in=managed_locations, is_active=True
-        ).values_list("user_id", flat=True).distinct()
+            location_id__in=managed_ids, start_utc__gte=week_start, start_utc__lt=week_end,
+        ).select_related("location", "required_skill").defer("notes", "location__address")
+        understaffed = list(week_shifts.understaffed())
+        staff_ids = list(LocationCertification.objects.filter(
+            location_id__in=managed_ids, is_active=True
+        ).values_list("user_id", flat=True).distinct())
         threshold = settings.SHIFTSYNC["WEEKLY_HOURS_WARNING"]
         hard_limit = settings.SHIFTSYNC["WEEKLY_HOURS_HARD_LIMIT"]
+        week_durations = {
+            row["user_id"]: row["total_duration"]
+            for row in ShiftAssignment.objects.filter(
+                user_id__in=staff_ids,
+                status__in=ShiftAssignment.ACTIVE_STATUSES,
+                shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
+            ).durations_by_user()
+        }
         staff_hours = []
-        for member in User.objects.filter(pk__in=staff_ids):
-            hours = sum(
-                a.shift.duration_hours
-                for a in ShiftAssignment.objects.filter(
-                    user=member,
-                    status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
-                    shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
-                ).select_related("shift")
-            )
+        # The hours table shows each member's name and skill badges, nothing else
+        staff = User.objects.filter(pk__in=staff_ids).only("first_name", "last_name").prefetch_related("skills")
+        for member in staff:
+            hours = week_durations.get(member.pk, timedelta()).total_seconds() / 3600
             # Gap 11: colour-code approaching/over limit
             if hours >= hard_limit:
                 hours_class = "text-danger fw-bold"
@@ -173,13 +213,13 @@ class DashboardView(View):
         return {
             "today": now.date(),
             "managed_locations": managed_locations,
-            "total_staff": staff_ids.count(),
+            "total_staff": len(staff_ids),
             "shifts_this_week": week_shifts.count(),
             "understaffed_shifts": understaffed,
             "understaffed_count": len(understaffed),
             "pending_swaps": SwapRequest.objects.filter(
                 status=SwapRequest.Status.PENDING_MANAGER,
-                assignment__shift__location__in=managed_locations,
+                assignment__shift__location_id__in=managed_ids,
             ).select_related("requester", "assignment__shift__location", "assignment__shift__required_skill"),
             "staff_hours": staff_hours,
             "hours_warning_threshold": threshold,
@@ -190,30 +230,35 @@ class DashboardView(View):
         now = timezone.now()
         week_start = now - timedelta(days=now.weekday())
         week_end = week_start + timedelta(days=7)
-        upcoming_assignments = (
+        # Rendered in full, so fetch once and take the next shift and count from the list
+        upcoming_assignments = list(
             ShiftAssignment.objects.filter(
                 user=user,
-                status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
+                status__in=ShiftAssignment.ACTIVE_STATUSES,
                 shift__start_utc__gte=now,
                 shift__start_utc__lte=now + timedelta(days=14),
             ).select_related("shift__location", "shift__required_skill").order_by("shift__start_utc")
         )
-        week_hours = sum(
-            a.shift.duration_hours
-            for a in ShiftAssignment.objects.filter(
-                user=user,
-                status__in=[ShiftAssignment.Status.ASSIGNED, ShiftAssignment.Status.SWAP_PENDING],
-                shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
-            ).select_related("shift")
-        )
-        my_swaps = SwapRequest.objects.filter(
+        week_hours = ShiftAssignment.objects.filter(
+            user=user,
+            status__in=ShiftAssignment.ACTIVE_STATUSES,
+            shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
+        ).total_duration().total_seconds() / 3600
+        my_swaps = list(SwapRequest.objects.filter(
             requester=user,
             status__in=[
                 SwapRequest.Status.PENDING_ACCEPTANCE, SwapRequest.Status.PENDING_MANAGER,
                 SwapRequest.Status.PENDING_PICKUP, SwapRequest.Status.APPROVED,
                 SwapRequest.Status.REJECTED,
             ],
-        ).select_related("target", "assignment__shift__location", "assignment__shift__required_skill").order_by("-created_at")
+        ).select_related("target", "assignment__shift").prefetch_related(
+            "assignment__shift__location", "assignment__shift__required_skill"
+        ).order_by(
+            # Unresolved requests first: MAX_PENDING_SWAP_REQUESTS keeps them well
+            # under the cap, so none is cut off and pending_count below is exact.
+            # The full history is on the swaps page.
+            Case(When(status__in=SwapRequest.PENDING_STATUSES, then=0), default=1), "-created_at",
+        )[:DASHBOARD_SWAP_LIMIT])
         certified_location_ids = LocationCertification.objects.filter(
             user=user, is_active=True
         ).values_list("location_id", flat=True)
@@ -221,17 +266,23 @@ class DashboardView(View):
             Shift.objects.filter(
                 is_published=True, location_id__in=certified_location_ids,
                 required_skill__in=user.skills.all(), start_utc__gte=now,
-            ).exclude(assignments__user=user).select_related("location", "required_skill").order_by("start_utc")
+                active_assignment_count__lt=F("headcount_needed"),
+            ).exclude(assignments__user=user).select_related("location", "required_skill")
+            # Only what the open-shifts list renders; the capacity filter above
+            # already runs on the stored count, so no per-row COUNT is needed
+            .only("start_utc", "end_utc", "location__name", "required_skill__display_name")
+            .order_by("start_utc")
+        )
+        claimable_shifts = list(claimable)
+        pending_count = sum(
+            swap.status in (SwapRequest.Status.PENDING_ACCEPTANCE, SwapRequest.Status.PENDING_MANAGER)
+            for swap in my_swaps
         )
-        claimable_shifts = [s for s in claimable if not s.is_fully_staffed]
-        pending_count = my_swaps.filter(
-            status__in=[SwapRequest.Status.PENDING_ACCEPTANCE, SwapRequest.Status.PENDING_MANAGER]
-        ).count()
         return {
             "today": now.date(),
             "upcoming_assignments": upcoming_assignments,
-            "next_shift": upcoming_assignments.first(),
-            "upcoming_count": upcoming_assignments.count(),
+            "next_shift": upcoming_assignments[0] if upcoming_assignments else None,
+            "upcoming_count": len(upcoming_assignments),
             "hours_this_week": week_hours,
             "my_swap_requests": my_swaps,
             "pending_swaps_count": pending_count,
@@ -242,18 +293,11 @@ class DashboardView(View):
     @staticmethod
     def _overtime_warning_count(week_start, week_end) -> int:
         threshold = settings.SHIFTSYNC["WEEKLY_HOURS_WARNING"]
-        count = 0
-        for member in User.objects.filter(role=User.Role.STAFF, is_active=True):
-            hours = sum(
-                a.shift.duration_hours
-                for a in ShiftAssignment.objects.filter(
-                    user=member, status=ShiftAssignment.Status.ASSIGNED,
-                    shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
-                ).select_related("shift")
-            )
-            if hours >= threshold:
-                count += 1
-        return count
+        return ShiftAssignment.objects.filter(
+            user__role=User.Role.STAFF, user__is_active=True,
+            status=ShiftAssignment.Status.ASSIGNED,
+            shift__start_utc__gte=week_start, shift__start_utc__lt=week_end,
+        ).durations_by_user().filter(total_duration__gte=timedelta(hours=threshold)).count()
 
 
 # ---------------------------------------------------------------------------
@@ -265,28 +309,82 @@ def on_duty_now(request: HttpRequest) -> HttpResponse:
     now = timezone.now()
     user = request.user
     if user.role == User.Role.ADMIN:
+        scope = "all"
         locations = Location.objects.filter(is_active=True)
     elif user.role == User.Role.MANAGER:
+        scope = f"manager:{user.pk}"
         locations = user.managed_locations.filter(is_active=True)
     else:
-        cert_ids = LocationCertification.objects.filter(user=user, is_active=True).values_list("location_id", flat=True)
-        locations = Location.objects.filter(pk__in=cert_ids)
-    on_duty_by_location = []
-    for loc in locations:
-        assignments = (
-            ShiftAssignment.objects.filter(
-                shift__location=loc, shift__start_utc__lte=now, shift__end_utc__gt=now,
-                status=ShiftAssignment.Status.ASSIGNED,
-            ).select_related("user", "shift__required_skill", "shift").order_by("user__last_name")
+        # Staff certified at the same locations share one entry
+        cert_ids = sorted(
+            LocationCertification.objects.filter(user=user, is_active=True).values_list("location_id", flat=True)
         )
-        on_duty_by_location.append({"location": loc, "assignments": list(assignments), "now": now})
-    return render(request, "scheduling/partials/on_duty_now.html", {"on_duty_by_location": on_duty_by_location})
+        scope = "locations:" + ",".join(map(str, cert_ids))
+        locations = Location.objects.filter(pk__in=cert_ids)
+    cache_key = f"sched:onduty:{on_duty_generation()}:{scope}:{timezone.get_current_timezone_name()}"
+    html = cache.get(cache_key)
+    if html is not None:
+        return HttpResponse(html)
+
+    # One query for every location in scope, bucketed here (ordering is kept per bucket)
+    on_duty = defaultdict(list)
+    for assignment in ShiftAssignment.objects.filter(
+        shift__location__in=locations, shift__start_utc__lte=now, shift__end_utc__gt=now,
+        status=ShiftAssignment.Status.ASSIGNED,
+    ).select_related("user", "shift__required_skill", "shift").order_by("user__last_name"):
+        on_duty[assignment.shift.location_id].append(assignment)
+    on_duty_by_location = [
+        {"location": loc, "assignments": on_duty.get(loc.pk, []), "now": now} for loc in locations
+    ]
+    html = render_to_string("scheduling/partials/on_duty_now.html", {"on_duty_by_location": on_duty_by_location})
+    cache.set(cache_key, html, ON_DUTY_CACHE_TIMEOUT)
+    return HttpResponse(html)
 
 
 # ---------------------------------------------------------------------------
 # Schedule (manager/admin)
 # ---------------------------------------------------------------------------
 
+def build_week_grid(shifts, week_start: date) -> dict:
+    """
+    Bucket a week's shifts by local date, then location.
+
+    Each location's UTC offset is taken once at the start of the week, so the
+    per-shift day arithmetic runs in the local_day_index kernel instead of an
+    astimezone() call per shift. A shift that starts within an hour of local
+    midnight on a DST-change day may land one cell off.
+
+    Args:
+        shifts: Shifts with location loaded, in display order.
+        week_start: Local date of the first day of the week.
+
+    Returns:
+        Nested dict {date: {location_id: [shifts]}} so each template cell is
+        an O(1) lookup; shifts outside the week are left out.
+    """
+    shifts = list(shifts)
+    if not shifts:
+        return {}
+    week_midnight = datetime.combine(week_start, datetime.min.time(), tzinfo=dt_timezone.utc)
+    offsets = {}
+    for shift in shifts:
+        if shift.location_id not in offsets:
+            local_midnight = week_midnight.replace(tzinfo=shift.location.get_zoneinfo())
+            offsets[shift.location_id] = local_midnight.utcoffset() // timedelta(microseconds=1) * 1_000
+    days = kernels.as_int64_array([0] * len(shifts))
+    kernels.local_day_index(
+        kernels.as_int64_array([kernels.to_ns(shift.start_utc) for shift in shifts]),
+        kernels.as_int64_array([offsets[shift.location_id] for shift in shifts]),
+        kernels.to_ns(week_midnight),
+        days,
+    )
+    grid = defaultdict(lambda: defaultdict(list))
+    for shift, day in zip(shifts, days):
+        if 0 <= day < 7:
+            grid[week_start + timedelta(days=int(day))][shift.location_id].append(shift)
+    return {day: dict(cells) for day, cells in grid.items()}
+
+
 class ScheduleView(ManagerRequiredMixin, View):
     def get(self, request: HttpRequest) -> HttpResponse:
         now = timezone.now()
@@ -303,23 +401,16 @@ class ScheduleView(ManagerRequiredMixin, View):
         week_end_date = week_start + timedelta(days=7)
         shifts = (
             Shift.objects.filter(
-                location__in=managed_locations,
-                start_utc__date__gte=week_start, start_utc__date__lt=week_end_date,
-            ).select_related("location", "required_skill").prefetch_related("assignments__user").order_by("start_utc")
+                location_id__in=self.get_manager_location_ids(),
+                # One day of slack either side: cells are local dates, the filter is UTC
+                start_utc__gte=_local_day_start(week_start - timedelta(days=1)),
+                start_utc__lt=_local_day_start(week_end_date + timedelta(days=1)),
+            ).select_related("location", "required_skill").prefetch_related("assignments__user")
+            .order_by("start_utc")
         )
-        for shift in shifts:
-            if not shift.is_published:
-                shift.css_border, shift.css_badge = "border-secondary", "bg-secondary"
-            elif shift.is_fully_staffed:
-                shift.css_border, shift.css_badge = "border-success", "bg-success"
-            else:
-                shift.css_border, shift.css_badge = "border-warning", "bg-warning text-dark"
-        grid = defaultdict(list)
-        for shift in shifts:
-            grid[(shift.start_utc.date(), shift.location_id)].append(shift)
         return render(request, "scheduling/schedule.html", {
             "managed_locations": managed_locations, "week_dates": week_dates,
-            "week_start": week_start, "grid": dict(grid),
+            "week_start": week_start, "grid": build_week_grid(shifts, week_start),
             "prev_week": (week_start - timedelta(days=7)).strftime("%G-W%V"),
             "next_week": (week_start + timedelta(days=7)).strftime("%G-W%V"),
             "current_week": week_start.strftime("%G-W%V"),
@@ -330,29 +421,42 @@ class ScheduleView(ManagerRequiredMixin, View):
 # My Shifts (staff) —NB: exposes swap/drop buttons per assignment
 # ---------------------------------------------------------------------------
 
+MY_SHIFTS_PAGE_SIZE = 20
+
+
 class MyShiftsView(StaffRequiredMixin, View):
-    """Full upcoming + past shift list. Includes Request Swap and Drop Shift actions."""
+    """
+    Full upcoming + past shift list. Includes Request Swap and Drop Shift actions.
+
+    Upcoming shifts are paged; the "Load more" row fetches the next page over
+    HTMX and swaps itself for those rows. Past shifts show the latest 20.
+    """
 
     def get(self, request: HttpRequest) -> HttpResponse:
         now = timezone.now()
         user = request.user
-        upcoming = (
+        # A user's history grows without bound but spans a handful of locations and
+        # skills: join each row's shift, and fetch those few rows once by prefetch
+        upcoming = Paginator(
             ShiftAssignment.objects.filter(user=user, shift__start_utc__gte=now)
-            .select_related("shift__location", "shift__required_skill").order_by("shift__start_utc")
-        )
+            .select_related("shift").defer("shift__notes")
+            .prefetch_related("shift__location", "shift__required_skill")
+            .order_by("shift__start_utc"),
+            MY_SHIFTS_PAGE_SIZE,
+        ).get_page(request.GET.get("page"))
+        if request.headers.get("HX-Request"):
+            return render(request, "scheduling/partials/my_shift_rows.html", {"upcoming": upcoming})
         past = (
             ShiftAssignment.objects.filter(user=user, shift__end_utc__lt=now)
-            .select_related("shift__location", "shift__required_skill").order_by("-shift__start_utc")
+            .select_related("shift").defer("shift__notes")
+            .prefetch_related("shift__location", "shift__required_skill")
+            .order_by("-shift__start_utc")[:20]
         )
         # Track which assignments already have a pending swap/drop so buttons can be disabled
         pending_assignment_ids = set(
             SwapRequest.objects.filter(
                 requester=user,
-                status__in=[
-                    SwapRequest.Status.PENDING_ACCEPTANCE,
-                    SwapRequest.Status.PENDING_PICKUP,
-                    SwapRequest.Status.PENDING_MANAGER,
-                ],
+                status__in=SwapRequest.PENDING_STATUSES,
             ).values_list("assignment_id", flat=True)
         )
         return render(request, "scheduling/my_shifts.html", {
@@ -402,11 +506,7 @@ class InitiateSwapView(StaffRequiredMixin, View):
         max_pending = settings.SHIFTSYNC["MAX_PENDING_SWAP_REQUESTS"]
         active_count = SwapRequest.objects.filter(
             requester=user,
-            status__in=[
-                SwapRequest.Status.PENDING_ACCEPTANCE,
-                SwapRequest.Status.PENDING_PICKUP,
-                SwapRequest.Status.PENDING_MANAGER,
-            ],
+            status__in=SwapRequest.PENDING_STATUSES,
         ).count()
         if active_count >= max_pending:
             msg.error(
@@ -564,8 +664,14 @@ class SwapReviewView(ManagerRequiredMixin, View):
         swap = get_object_or_404(SwapRequest, pk=pk)
         return render(request, "scheduling/swap_review.html", {"swap": swap})
 
+    @transaction.atomic
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
-        swap = get_object_or_404(SwapRequest, pk=pk)
+        # Lock the request row so a double submit, or two managers reviewing at
+        # once, queue up here; the second one then finds it already settled
+        swap = get_object_or_404(SwapRequest.objects.select_for_update(), pk=pk)
+        if not swap.is_pending:
+            msg.error(request, f"This request was already {swap.get_status_display().lower()}.")
+            return redirect("scheduling:swap_review", pk=pk)
         action = request.POST.get("action")
 
         if action == "approve":
@@ -576,7 +682,7 @@ class SwapReviewView(ManagerRequiredMixin, View):
 
             # re-validate all 8 constraints for the incoming person
             result = ConstraintEngine.check(user=incoming, shift=swap.assignment.shift)
-            if not result.ok and result.severity != "override_required":
+            if not result.ok and result.severity != Severity.OVERRIDE_REQUIRED:
                 suggestion_names = ", ".join(s.full_name for s in result.suggestions[:3])
                 detail = f" Consider: {suggestion_names}." if suggestion_names else ""
                 msg.error(
@@ -598,7 +704,7 @@ class SwapReviewView(ManagerRequiredMixin, View):
             swap.manager_reviewed_at = timezone.now()
             swap.save(update_fields=["status", "reviewed_by", "manager_reviewed_at"])
 
-            if result.severity == "warning":
+            if result.severity == Severity.WARNING:
                 msg.warning(request, f"Approved with warning: {result.reason}")
             else:
                 msg.success(request, "Swap approved and assignments updated.")
@@ -667,16 +773,22 @@ class SwapReviewView(ManagerRequiredMixin, View):
 def claim_shift(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method != "POST":
         return HttpResponse(status=405)
-    shift = get_object_or_404(Shift, pk=pk)
-    if shift.is_fully_staffed:
-        return HttpResponse(
-            '<li class="list-group-item text-warning py-3">'
-            '<i class="bi bi-exclamation-circle me-1"></i>This shift was just claimed by someone else.</li>'
+    with transaction.atomic():
+        # Staff racing for the last place queue on the shift row lock; the count
+        # is read after it, so it already includes the winner's assignment
+        shift = get_object_or_404(
+            Shift.objects.select_for_update(of=("self",)).select_related("required_skill"),
+            pk=pk,
+        )
+        if shift.is_fully_staffed:
+            return HttpResponse(
+                '<li class="list-group-item text-warning py-3">'
+                '<i class="bi bi-exclamation-circle me-1"></i>This shift was just claimed by someone else.</li>'
+            )
+        ShiftAssignment.objects.create(
+            shift=shift, user=request.user, assigned_by=request.user,
+            status=ShiftAssignment.Status.ASSIGNED,
         )
-    ShiftAssignment.objects.create(
-        shift=shift, user=request.user, assigned_by=request.user,
-        status=ShiftAssignment.Status.ASSIGNED,
-    )
     logger.info("Staff %d claimed shift %d", request.user.pk, pk)
     return HttpResponse(
         '<li class="list-group-item text-success py-3">'
@@ -699,14 +811,38 @@ class LocationListView(AdminRequiredMixin, View):
 # Shift management — create, assign, publish, delete
 # ---------------------------------------------------------------------------
 
+def _local_day_start(day: date) -> datetime:
+    """
+    Return midnight at the start of day in the active timezone.
+
+    Filtering start_utc against these bounds selects the same rows as
+    start_utc__date on the active timezone, but as a plain range the
+    database can answer from the (location, start_utc) index rather than
+    casting every row's start_utc to a date.
+    """
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _back_to_shift_manage(request: HttpRequest) -> HttpResponse:
+    """
+    Return a toggle/delete caller to the shift table.
+
+    The row buttons post over HTMX; when they can't swap in a fragment (an
+    error or lost race) HX-Refresh reloads the page so the flash message
+    shows. Plain form posts get the usual redirect.
+    """
+    if request.headers.get("HX-Request"):
+        return HttpResponse(headers={"HX-Refresh": "true"})
+    return redirect("scheduling:shift_manage")
+
+
 class ShiftManageView(ManagerRequiredMixin, View):
     def get(self, request: HttpRequest) -> HttpResponse:
-        from apps.accounts.models import Skill
         managed_locations = self.get_manager_locations()
         now = timezone.now()
         from_date_raw = request.GET.get("from_date")
         try:
-            from_date = datetime.strptime(from_date_raw, "%Y-%m-%d").date()
+            from_date = date.fromisoformat(from_date_raw)
         except (ValueError, TypeError):
             from_date = now.date() - timedelta(days=now.weekday())
         to_date = from_date + timedelta(days=7)
@@ -719,55 +855,72 @@ class ShiftManageView(ManagerRequiredMixin, View):
                 pass
         shifts = (
             Shift.objects.filter(
-                location__in=managed_locations,
-                start_utc__date__gte=from_date, start_utc__date__lt=to_date,
-            ).select_related("location", "required_skill").prefetch_related("assignments__user").order_by("start_utc")
+                location_id__in=self.get_manager_location_ids(),
+                start_utc__gte=_local_day_start(from_date), start_utc__lt=_local_day_start(to_date),
+            ).select_related("location", "required_skill").prefetch_related("assignments__user")
+            .order_by("start_utc")
         )
         if selected_location_id:
             shifts = shifts.filter(location_id=selected_location_id)
         status_filter = request.GET.get("status", "")
         if status_filter == "draft":
-            shifts = [s for s in shifts if not s.is_published]
+            shifts = shifts.filter(is_published=False)
         elif status_filter == "published":
-            shifts = [s for s in shifts if s.is_published]
+            shifts = shifts.filter(is_published=True)
         elif status_filter == "understaffed":
-            shifts = [s for s in shifts if s.is_published and not s.is_fully_staffed]
-        else:
-            shifts = list(shifts)
+            shifts = shifts.understaffed()
+        shifts = list(shifts)
         unpublished_count = sum(1 for s in shifts if not s.is_published)
-        staff_map = {}
-        week_start_dt = timezone.make_aware(datetime.combine(from_date, datetime.min.time()))
-        week_end_dt = week_start_dt + timedelta(days=7)
-        for loc in managed_locations:
-            certs = LocationCertification.objects.filter(
-                location=loc, is_active=True
-            ).prefetch_related("user__skills").select_related("user")
-            for cert in certs:
-                member = cert.user
-                hours = sum(
-                    a.shift.duration_hours
-                    for a in ShiftAssignment.objects.filter(
-                        user=member, status__in=[ShiftAssignment.Status.ASSIGNED],
-                        shift__start_utc__gte=week_start_dt, shift__start_utc__lt=week_end_dt,
-                    ).select_related("shift")
-                )
-                for skill in member.skills.all():
-                    key = f"{loc.pk}-{skill.pk}"
-                    if key not in staff_map:
-                        staff_map[key] = []
-                    staff_map[key].append({"id": member.pk, "name": member.get_full_name(), "hours": round(hours, 1)})
         return render(request, "scheduling/shift_manage.html", {
             "managed_locations": managed_locations, "shifts": shifts,
             "from_date": from_date, "selected_location_id": selected_location_id,
             "status_filter": status_filter, "unpublished_count": unpublished_count,
-            "all_skills": Skill.objects.all(), "staff_json": json.dumps(staff_map),
+            "all_skills": Skill.objects.all(),
         })
 
 
+class AssignCandidatesView(ManagerRequiredMixin, View):
+    """
+    Staff who can be picked in the assign modal for one shift, as JSON.
+
+    Fetched when the modal opens, so ShiftManageView no longer embeds the
+    roster of every location × skill pair in each page it renders. Hours are
+    ASSIGNED time in the Monday-to-Sunday week the shift starts in.
+    """
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        shift = self.get_managed_object_or_403(
+            Shift.objects.only("location_id", "required_skill_id", "start_utc"), pk
+        )
+        shift_date = timezone.localdate(shift.start_utc)
+        week_start = _local_day_start(shift_date - timedelta(days=shift_date.weekday()))
+        staff = list(
+            User.objects.filter(
+                location_certifications__location_id=shift.location_id,
+                location_certifications__is_active=True,
+                skills=shift.required_skill_id,
+            ).only("first_name", "last_name").order_by("first_name", "last_name")
+        )
+        week_durations = {
+            row["user_id"]: row["total_duration"]
+            for row in ShiftAssignment.objects.filter(
+                user_id__in=[member.pk for member in staff], status=ShiftAssignment.Status.ASSIGNED,
+                shift__start_utc__gte=week_start, shift__start_utc__lt=week_start + timedelta(days=7),
+            ).durations_by_user()
+        }
+        return JsonResponse({"candidates": [
+            {
+                "id": member.pk,
+                "name": member.get_full_name(),
+                "hours": round(week_durations.get(member.pk, timedelta()).total_seconds() / 3600, 1),
+            }
+            for member in staff
+        ]})
+
+
 @method_decorator(login_required(login_url="/accounts/login/"), name="dispatch")
 class CreateShiftView(ManagerRequiredMixin, View):
     def post(self, request: HttpRequest) -> HttpResponse:
-        from apps.accounts.models import Skill
         location = self.get_location_or_403(int(request.POST.get("location_id", 0)))
         skill = get_object_or_404(Skill, pk=request.POST.get("skill_id"))
         try:
@@ -817,7 +970,7 @@ class AssignStaffView(ManagerRequiredMixin, View):
         result = ConstraintEngine.check(user=staff_member, shift=shift)
 
         if not result.ok:
-            if result.severity == "override_required":
+            if result.severity == Severity.OVERRIDE_REQUIRED:
                 override_reason = request.POST.get("override_reason", "").strip()
                 if not override_reason:
                     msg.warning(
@@ -827,7 +980,6 @@ class AssignStaffView(ManagerRequiredMixin, View):
                     )
                     # Redirect back with params so the modal auto-opens with the
                     # override reason field visible (JS reads ?override_needed=1)
-                    from django.urls import reverse
                     base = reverse("scheduling:shift_manage")
                     qs = (
                         f"?override_needed=1"
@@ -851,21 +1003,21 @@ class AssignStaffView(ManagerRequiredMixin, View):
             msg.warning(request, f"{staff_member.get_full_name()} is already assigned to this shift.")
             return redirect("scheduling:shift_manage")
 
-        if result.severity == "override_required":
+        if result.severity == Severity.OVERRIDE_REQUIRED:
             override_reason = request.POST.get("override_reason", "").strip()
             ManagerOverride.objects.create(
                 manager=request.user, assignment=assignment,
                 constraint_violated=result.constraint_id, reason=override_reason,
             )
             msg.warning(request, f"{staff_member.get_full_name()} assigned with manager override: {override_reason}")
-        elif result.severity == "warning":
+        elif result.severity == Severity.WARNING:
             msg.warning(request, f"Assigned — note: {result.reason}")
         else:
             msg.success(request, f"{staff_member.get_full_name()} assigned to shift.")
 
         logger.info(
             "Manager %d assigned user %d to shift %d (severity=%s)",
-            request.user.pk, staff_member.pk, shift.pk, result.severity,
+            request.user.pk, staff_member.pk, shift.pk, result.severity_label,
         )
 
         # notify location schedule group + assigned staff member via WebSocket
@@ -893,31 +1045,37 @@ class TogglePublishView(ManagerRequiredMixin, View):
     POST-only: toggle a shift's is_published flag.
 
     GAP 2 FIX: blocks unpublishing a shift that is within the 48-hour edit cutoff.
+
+    The form posts the state the manager saw as was_published, and the flip is a
+    compare-and-set UPDATE on it: if another manager toggled the shift in the
+    meantime, nothing changes and the manager is asked to review it again,
+    instead of the two clicks silently cancelling out.
+
+    HTMX callers get the re-rendered table row back instead of a redirect and
+    a full reload of the shift table.
     """
 
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
-        shift = get_object_or_404(Shift, pk=pk)
-        self.get_location_or_403(shift.location_id)
+        shift = self.get_managed_object_or_403(Shift.objects, pk)
+        was_published = request.POST.get("was_published")
+        expected = shift.is_published if was_published is None else was_published == "1"
 
         # enforce edit cutoff — schedule locked once window has passed
-        if shift.is_published and shift.is_past_edit_cutoff:
+        if expected and shift.is_past_edit_cutoff:
             msg.error(
                 request,
                 f"This shift is locked — it starts within {shift.edit_cutoff_hours} hours "
                 f"and cannot be unpublished. Use the swap/drop workflow for last-minute changes.",
             )
-            return redirect("scheduling:shift_manage")
-
-        shift.is_published = not shift.is_published
-        if shift.is_published:
-            shift.published_at = timezone.now()
-            shift.published_by = request.user
-            shift.save(update_fields=["is_published", "published_at", "published_by"])
-        else:
-            shift.save(update_fields=["is_published"])
+            return _back_to_shift_manage(request)
 
-        state = "published" if shift.is_published else "unpublished (draft)"
-        msg.success(request, f"Shift {state}.")
+        changes = {"is_published": not expected}
+        if not expected:
+            changes.update(published_at=timezone.now(), published_by=request.user)
+        if not Shift.objects.filter(pk=pk, is_published=expected).update(**changes):
+            msg.warning(request, "This shift was just changed by someone else. Review it and try again.")
+            return _back_to_shift_manage(request)
+        shift.is_published = not expected
 
         # Gap 6: if just published, broadcast to the location's schedule group
         if shift.is_published:
@@ -927,27 +1085,50 @@ class TogglePublishView(ManagerRequiredMixin, View):
                 "week": shift.start_utc.strftime("%G-W%V"),
                 "published_by": request.user.get_full_name(),
             })
+
+        if request.headers.get("HX-Request"):
+            shift = Shift.objects.select_related("location", "required_skill").prefetch_related(
+                "assignments__user"
+            ).get(pk=pk)
+            return render(request, "scheduling/partials/shift_manage_row.html", {"shift": shift})
+
+        state = "published" if shift.is_published else "unpublished (draft)"
+        msg.success(request, f"Shift {state}.")
         return redirect("scheduling:shift_manage")
 
 
 @method_decorator(login_required(login_url="/accounts/login/"), name="dispatch")
 class PublishWeekView(ManagerRequiredMixin, View):
+    """
+    POST-only: publish every draft shift in the manager's locations for one week.
+
+    The publish is a single UPDATE, stamped with published_at/published_by like
+    a single-shift publish. ATOMIC_REQUESTS already makes the request one
+    transaction, so it commits once however many drafts it touches.
+    """
+
     def post(self, request: HttpRequest) -> HttpResponse:
         from_date_raw = request.POST.get("from_date")
         try:
-            from_date = datetime.strptime(from_date_raw, "%Y-%m-%d").date()
+            from_date = date.fromisoformat(from_date_raw)
         except (ValueError, TypeError):
-            from_date = timezone.now().date() - timedelta(days=timezone.now().weekday())
+            now = timezone.now()
+            from_date = now.date() - timedelta(days=now.weekday())
         to_date = from_date + timedelta(days=7)
-        managed_locations = self.get_manager_locations()
-        qs = Shift.objects.filter(
-            location__in=managed_locations, is_published=False,
-            start_utc__date__gte=from_date, start_utc__date__lt=to_date,
-        )
+        # Loaded once: the ids filter the UPDATE, the rows drive the broadcasts below
+        managed_locations = list(self.get_manager_locations())
         loc_param = request.POST.get("location")
         if loc_param:
-            qs = qs.filter(location_id=loc_param)
-        count = qs.update(is_published=True)
+            # A bad id publishes nothing rather than falling back to every location
+            try:
+                managed_locations = [self.get_location_or_403(int(loc_param))]
+            except ValueError:
+                msg.error(request, "Unknown location.")
+                return redirect("scheduling:shift_manage")
+        count = Shift.objects.filter(
+            location_id__in=[loc.pk for loc in managed_locations], is_published=False,
+            start_utc__gte=_local_day_start(from_date), start_utc__lt=_local_day_start(to_date),
+        ).update(is_published=True, published_at=timezone.now(), published_by=request.user)
         msg.success(request, f"{count} shift{'s' if count != 1 else ''} published.")
 
         # Gap 6: broadcast schedule-published to every affected location group
@@ -965,11 +1146,13 @@ class PublishWeekView(ManagerRequiredMixin, View):
 class DeleteShiftView(ManagerRequiredMixin, View):
     """
     POST-only: delete an unpublished shift.
+
+    HTMX callers get an empty 200 on success, which swaps the row out of the
+    table in place.
     """
 
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
-        shift = get_object_or_404(Shift, pk=pk)
-        self.get_location_or_403(shift.location_id)
+        shift = self.get_managed_object_or_403(Shift.objects, pk)
 
         if shift.is_published:
             msg.error(request, "Cannot delete a published shift. Unpublish it first.")
@@ -981,6 +1164,8 @@ class DeleteShiftView(ManagerRequiredMixin, View):
             )
         else:
             shift.delete()
+            if request.headers.get("HX-Request"):
+                return HttpResponse("")
             msg.success(request, "Draft shift deleted.")
 
-        return redirect("scheduling:shift_manage")
\ No newline at end of file
+        return _back_to_shift_manage(request)
\ No newline at end of file
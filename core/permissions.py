@@ -18,7 +18,9 @@ import logging
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
+from django.db.models import Exists, OuterRef
 from django.http import HttpRequest
+from django.shortcuts import get_object_or_404
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +72,7 @@ class ManagerRequiredMixin(RoleRequiredMixin):
     """Restrict access to Manager (and Admin) users."""
 
     required_roles = ["admin", "manager"]
+    _manager_locations = None
 
     def get_manager_locations(self):
         """
@@ -77,15 +80,36 @@ class ManagerRequiredMixin(RoleRequiredMixin):
 
         Admins see all locations. Managers see only their assigned locations.
 
+        The queryset is built once per view instance, i.e. once per request, so
+        every caller shares its result cache: after the first evaluation,
+        iterating it again or calling get_location_or_403() costs no query.
+        Filters that use it as a subquery are unaffected.
+
         Returns:
             QuerySet of Location instances.
         """
-        from apps.locations.models import Location
+        if self._manager_locations is None:
+            from apps.locations.models import Location
+
+            user = self.request.user
+            if user.is_admin:
+                self._manager_locations = Location.objects.filter(is_active=True)
+            else:
+                self._manager_locations = user.managed_locations.filter(is_active=True)
+        return self._manager_locations
 
-        user = self.request.user
-        if user.is_admin:
-            return Location.objects.filter(is_active=True)
-        return user.managed_locations.filter(is_active=True)
+    def get_manager_location_ids(self) -> list:
+        """
+        Return the primary keys of the locations this user can manage.
+
+        Read from the shared get_manager_locations() result, so filtering on
+        location_id__in with these sends a plain IN list instead of repeating
+        the managed-locations subquery in every statement.
+
+        Returns:
+            List of Location primary keys.
+        """
+        return [loc.pk for loc in self.get_manager_locations()]
 
     def get_location_or_403(self, location_id: int):
         """
@@ -100,11 +124,42 @@ class ManagerRequiredMixin(RoleRequiredMixin):
         Raises:
             PermissionDenied: If the manager doesn't manage this location.
         """
-        location = self.get_manager_locations().filter(pk=location_id).first()
+        # A manager's locations are few: load them all once (shared with any
+        # later get_manager_locations() iteration) instead of a per-id query
+        location = next((loc for loc in self.get_manager_locations() if loc.pk == location_id), None)
         if not location:
             raise PermissionDenied("You don't manage this location.")
         return location
 
+    def get_managed_object_or_403(self, queryset, pk: int, location_field: str = "location_id"):
+        """
+        Fetch one row and check its location is managed by this user, in one query.
+
+        Saves the separate get_location_or_403() round trip for views that only
+        need the location to authorise access to the row.
+
+        Args:
+            queryset:       QuerySet or manager to fetch from (e.g. Shift.objects).
+            pk:             Primary key of the requested row.
+            location_field: Field on the row holding its location id.
+
+        Returns:
+            The model instance.
+
+        Raises:
+            Http404: If no such row exists.
+            PermissionDenied: If the manager doesn't manage the row's location.
+        """
+        obj = get_object_or_404(
+            queryset.annotate(
+                _location_managed=Exists(self.get_manager_locations().filter(pk=OuterRef(location_field)))
+            ),
+            pk=pk,
+        )
+        if not obj._location_managed:
+            raise PermissionDenied("You don't manage this location.")
+        return obj
+
 
 class StaffRequiredMixin(RoleRequiredMixin):
     """Restrict access to Staff users (all roles can access staff views)."""
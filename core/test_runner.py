@@ -0,0 +1,22 @@
+"""
+Test runner for ShiftSync.
+
+Selected by shiftsync.settings.test when the suite runs against Postgres.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class KeepDBDiscoverRunner(DiscoverRunner):
+    """
+    DiscoverRunner that keeps the test database between runs by default.
+
+    Equivalent to always passing --keepdb: the migrated Postgres test database
+    is reused instead of being created and migrated on every run, and any new
+    migrations are applied to it. Set TEST_KEEPDB = False (TEST_KEEPDB=0 in the
+    environment) to rebuild it from scratch.
+    """
+
+    def __init__(self, *args, keepdb=False, **kwargs):
+        super().__init__(*args, keepdb=keepdb or getattr(settings, "TEST_KEEPDB", False), **kwargs)
@@ -126,6 +126,9 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        # Keep server-side cursors on so QuerySet.iterator() streams rows (expiry
+        # sweeps); set True if a transaction-pooling PgBouncer sits in front
+        'DISABLE_SERVER_SIDE_CURSORS': False,
     }
 }
 
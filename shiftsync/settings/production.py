@@ -25,6 +25,14 @@ SECURE_HSTS_PRELOAD = True
 #     default=["shiftsync.fly.dev", "localhost", "*"],
 # )
 
+# Shared cache so constraint-suggestion invalidation reaches every web/worker process
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("REDIS_URL", default="redis://localhost:6379/0"),
+    },
+}
+
 # Email: simulated via console for the demo (no SMTP needed)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
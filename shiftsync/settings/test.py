@@ -0,0 +1,25 @@
+"""Test-run settings for ShiftSync (python manage.py test --settings=shiftsync.settings.test)."""
+
+from .local import *  # noqa: F401, F403
+
+# Fixtures call create_user() constantly; PBKDF2's iterations dominate setup
+# time, and no test depends on the hash being strong
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# In-memory SQLite removes the network round trip from every fixture INSERT.
+# The schema has nothing Postgres-only (partial indexes and JSON fields work on
+# SQLite, and the expiry sweep falls back to the ORM), but select_for_update
+# and the expiry CTE are no-ops or skipped there: set TEST_POSTGRES=1 to run
+# against the configured Postgres database, e.g. before merging.
+if not env.bool("TEST_POSTGRES", default=False):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+            "ATOMIC_REQUESTS": True,
+        }
+    }
+else:
+    # Reuse the migrated Postgres test database between runs (as --keepdb)
+    TEST_RUNNER = "core.test_runner.KeepDBDiscoverRunner"
+    TEST_KEEPDB = env.bool("TEST_KEEPDB", default=True)